@@ -0,0 +1,149 @@
+"""Benchmark do pipeline de empacotamento, etapa por etapa.
+
+Uso::
+
+    python -m benchmarks.bench_packing --sizes small medium large --repeat 3 \
+        --out benchmarks/results/atual.json --compare benchmarks/results/anterior.json
+
+Cada caso roda em um processo novo, para que o pico de memória (ru_maxrss)
+seja só dele. O resultado é um JSON com tempos por etapa (mediana das
+repetições), caixas por segundo, pico de memória e ocupação.
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from . import synthetic
+
+STAGES = ["load", "expand", "pack", "analyze"]
+
+def _run_case(profile: str, seed: int, fmt: str, block: bool, repeat: int) -> dict:
+    """Executa um caso (no processo filho) e mede cada etapa"""
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from cubagem.engine import Trailer, analyze_packing_efficiency, pack_grouped_corrected
+    from cubagem import ingest
+    import openpyxl, pandas  # noqa: F401  (importações fora da medição)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ingest.CACHE_DIR = Path(tmp) / "cache"   # mede a leitura do Excel, não o cache
+        car, med = synthetic.write_tables(profile, Path(tmp), seed, fmt)
+        trailer = Trailer(*synthetic.PROFILES[profile]["trailer"])
+        timings = {s: [] for s in STAGES}
+        for _ in range(repeat):
+            ingest._measures_cache.clear()
+            shutil.rmtree(ingest.CACHE_DIR, ignore_errors=True)
+            t0 = time.perf_counter()
+            if fmt == "csv":
+                # Leitura em fluxo já entrega o inventário
+                inventory, _ = ingest.stream_inventory(car, med, ["XY"])
+                t1 = t2 = time.perf_counter()
+            else:
+                merged, _ = ingest.load_files(car, med)
+                t1 = time.perf_counter()
+                inventory = ingest.expand_grouped_with_rotation(merged, ["XY"])
+                t2 = time.perf_counter()
+            placed, unplaced = pack_grouped_corrected(trailer, inventory, block=block)
+            t3 = time.perf_counter()
+            analysis = analyze_packing_efficiency(placed, trailer, unplaced)
+            t4 = time.perf_counter()
+            for stage, dt in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3)):
+                timings[stage].append(dt)
+
+    stage_s = {s: statistics.median(v) for s, v in timings.items()}
+    return {
+        "profile": profile,
+        "seed": seed,
+        "format": fmt,
+        "block": block,
+        "total_boxes": len(inventory),
+        "placed_boxes": len(placed),
+        "stage_s": stage_s,
+        "total_s": sum(stage_s.values()),
+        "boxes_per_s": len(placed) / stage_s["pack"] if stage_s["pack"] > 0 else None,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "volume_efficiency": analysis.get("volume_efficiency", 0.0),
+    }
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecida"
+
+def run(sizes, seed=0, fmt="xlsx", block=True, repeat=3) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    cases = []
+    for profile in sizes:
+        with ctx.Pool(1) as pool:
+            case = pool.apply(_run_case, (profile, seed, fmt, block, repeat))
+        cases.append(case)
+        print(f"{profile:>7}: {case['total_boxes']:>7} caixas  "
+              + "  ".join(f"{s}={case['stage_s'][s]:.3f}s" for s in STAGES)
+              + f"  {case['boxes_per_s'] or 0:,.0f} cx/s  {case['peak_rss_mb']:.0f} MB"
+              + f"  {case['volume_efficiency']:.1f}%", file=sys.stderr)
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_rev": _git_rev(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cases": cases,
+    }
+
+def compare(current: dict, previous: dict, tolerance: float = 0.10) -> list:
+    """Lista regressões (tempo ou memória acima de ``tolerance``, ocupação menor)"""
+    regressions = []
+    old = {(c["profile"], c["format"], c["block"]): c for c in previous["cases"]}
+    for c in current["cases"]:
+        o = old.get((c["profile"], c["format"], c["block"]))
+        if o is None:
+            continue
+        checks = [(f"stage_s.{s}", c["stage_s"][s], o["stage_s"][s]) for s in STAGES]
+        checks.append(("peak_rss_mb", c["peak_rss_mb"], o["peak_rss_mb"]))
+        for name, new, prev in checks:
+            if prev > 0 and new > prev * (1 + tolerance) and new - prev > 0.005:
+                regressions.append(f"{c['profile']}: {name} {prev:.3f} -> {new:.3f}")
+        if c["volume_efficiency"] < o["volume_efficiency"] - 1e-6:
+            regressions.append(f"{c['profile']}: volume_efficiency "
+                               f"{o['volume_efficiency']:.2f} -> {c['volume_efficiency']:.2f}")
+    return regressions
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--sizes", nargs="+", choices=list(synthetic.PROFILES), default=["small", "medium"])
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--formato", choices=["xlsx", "csv"], default="xlsx")
+    p.add_argument("--caixa-a-caixa", action="store_true", help="desliga o empacotamento em blocos")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--out", help="arquivo JSON de saída (padrão: saída padrão)")
+    p.add_argument("--compare", help="JSON de uma execução anterior para comparar")
+    p.add_argument("--tolerance", type=float, default=0.10)
+    args = p.parse_args(argv)
+
+    result = run(args.sizes, args.seed, args.formato, not args.caixa_a_caixa, args.repeat)
+    text = json.dumps(result, indent=2)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        regressions = compare(result, json.loads(Path(args.compare).read_text()), args.tolerance)
+        for r in regressions:
+            print(f"REGRESSÃO {r}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
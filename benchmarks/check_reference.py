@@ -0,0 +1,233 @@
+"""Confere o motor atual contra o motor de referência (``benchmarks.reference``).
+
+Uso::
+
+    python -m benchmarks.check_reference --sizes small medium --seeds 5
+
+Verificações, em cargas sintéticas de cada perfil e semente:
+
+- skyline: sequências aleatórias de caixas numa camada só;
+  ``SkylineLayer.place`` dá as mesmas posições e orientações da varredura
+  linear original. A referência percorre as orientações na ordem de um
+  ``set``; quando duas orientações empatam exatamente na sobra, o motor
+  atual fica com a primeira da ordem fixa (original, XY). Esses empates
+  são contados à parte e encerram a camada, sem contar como divergência;
+- caixa a caixa: ``pack_grouped_corrected(block=False)`` coloca as mesmas
+  caixas, nas mesmas posições e orientações, e deixa de fora as mesmas
+  quantidades que a referência. Vale também com um cache de padrões vazio
+  e na passada seguinte, que reaproveita os padrões gravados;
+- blocos: ``block=True`` coloca pelo menos o volume da passada caixa a
+  caixa, com cada conjunto de eixos de rotação (não depende da referência).
+  As posições podem diferir; as cargas em que isso acontece são contadas;
+- incremental: ``IncrementalPlan`` montado com metade dos grupos e depois
+  ``add`` da outra metade coloca tudo o que a passada completa coloca, nas
+  mesmas posições; depois de ``remove`` de um quinto dos SKUs, com e sem
+  ``refill``, nenhuma caixa restante se perde, nenhuma se sobrepõe a outra
+  e nenhuma passa do teto. O volume colocado contra uma passada completa
+  sobre o que restou é só informado (faixa e média), sem contar como falha.
+
+As cargas usam só a rotação XY: com XZ/YZ a referência calcula errado a
+altura de algumas orientações e desempata as orientações em outra ordem.
+Os casos em que a referência deixa caixas acima do teto do trailer são
+contados à parte: o motor atual não passa do teto, então ali os planos
+diferem de propósito.
+
+Sai com código 1 se alguma verificação falhar.
+"""
+import argparse
+import random
+import sys
+import tempfile
+from pathlib import Path
+from typing import List, Tuple
+
+from cubagem.engine import HEIGHT_EPS, Box, BoxInventory, SkylineLayer, Trailer, pack_grouped_corrected
+from cubagem.incremental import IncrementalPlan
+from cubagem.ingest import stream_inventory
+from cubagem.patterns import PatternCache
+
+from . import reference, synthetic
+
+# Eixos de rotação da verificação dos blocos
+ROTATION_SETS = [["XY"], ["XY", "XZ"], ["XY", "XZ", "YZ"]]
+VOLUME_TOL = 1e-9   # tolerância relativa ao comparar volumes colocados
+POS_TOL = 1e-7      # tolerância ao comparar faces de caixas colocadas
+REMOVE_SHARE = 5    # o plano incremental retira 1 a cada REMOVE_SHARE SKUs
+
+# Trailers de cada carga: o do perfil, um baixo (fecha cedo) e um curto
+TRAILERS = [None, (13.6, 2.45, 1.2), (6.0, 2.45, 2.5)]
+
+def _placements(boxes) -> List[Tuple]:
+    return [(b.id, b.pos, (b.c, b.l, b.a)) for b in boxes]
+
+def _is_tie(sky, L: float, ref_pos, ref_dims, cur_pos, cur_dims) -> bool:
+    """O motor atual escolheu outra orientação, com a mesma sobra da referência na skyline ``sky``?"""
+    waste = {(x, y): fx for x, y, fx in sky}
+    if cur_dims == ref_dims or ref_pos not in waste or cur_pos not in waste:
+        return False
+    w, d = cur_dims[:2]
+    return (w <= waste[cur_pos] and cur_pos[1] + d <= L
+            and waste[cur_pos] - w == waste[ref_pos] - ref_dims[0])
+
+def check_skyline(cases: int, seed: int = 0) -> Tuple[int, int, List[str]]:
+    """Camadas aleatórias na skyline atual e na original; retorna (camadas, empates, falhas)"""
+    rnd = random.Random(seed)
+    ties, failures = 0, []
+    for n in range(cases):
+        C, L = rnd.choice([(13.6, 2.45), (6.0, 2.4), (2.45, 2.45)])
+        ref, cur = reference.SkylineLayer(C, L), SkylineLayer(C, L)
+        for k in range(rnd.randint(5, 80)):
+            dims = tuple(round(rnd.uniform(0.1, 1.5), 2) for _ in range(3))
+            rb, cb = reference.Box("A", *dims, ["XY"]), Box("A", *dims, ("XY",))
+            sky = list(ref.sky)
+            r_ok, r_pos = ref.place(rb)
+            c_ok, c_pos = cur.place(cb)
+            r_dims, c_dims = (rb.c, rb.l, rb.a), (cb.c, cb.l, cb.a)
+            if (r_ok, r_pos, r_dims) == (c_ok, c_pos, c_dims):
+                continue
+            if r_ok and c_ok and _is_tie(sky, L, r_pos, r_dims, c_pos, c_dims):
+                ties += 1
+            else:
+                failures.append(f"skyline caso {n}, caixa {k} {dims}: referência {r_pos} "
+                                f"{r_dims}, atual {c_pos} {c_dims}")
+            break
+    return cases, ties, failures
+
+def load_cases(sizes, seeds: int, axes, tmp: Path):
+    """(nome, trailer, inventário) para cada perfil, semente e trailer de ``TRAILERS``"""
+    for profile in sizes:
+        for seed in range(seeds):
+            car, med = synthetic.write_tables(profile, tmp / f"{profile}-{seed}", seed, "csv")
+            inventory, _ = stream_inventory(car, med, axes)
+            for dims in TRAILERS:
+                dims = dims or synthetic.PROFILES[profile]["trailer"]
+                yield f"{profile}/{seed} {dims[0]}x{dims[1]}x{dims[2]}", Trailer(*dims), inventory
+
+def check_per_box(cases, tmp: Path) -> Tuple[int, int, List[str]]:
+    """Passada caixa a caixa contra a referência; retorna (casos, acima do teto, falhas)"""
+    total, over_roof, failures = 0, 0, []
+    for n, (name, trailer, inventory) in enumerate(cases):
+        total += 1
+        ref_placed, ref_unplaced = reference.pack_grouped_corrected(
+            trailer, reference.boxes_from_inventory(inventory))
+        if ref_placed and max(b.pos[2] + b.a for b in ref_placed) > trailer.a + HEIGHT_EPS:
+            over_roof += 1
+            continue
+        expected = (_placements(ref_placed), len(ref_unplaced))
+        cache = PatternCache(tmp / f"padroes-{n}.sqlite")
+        for label, extra in (("sem padrões", {}), ("cache vazio", {"patterns": cache}),
+                             ("padrões reaproveitados", {"patterns": cache})):
+            placed, unplaced = pack_grouped_corrected(trailer, inventory, block=False, **extra)
+            if (_placements(placed), len(unplaced)) != expected:
+                failures.append(f"caixa a caixa {name} ({label}): {len(placed)} colocadas, "
+                                f"referência {len(ref_placed)}")
+    return total, over_roof, failures
+
+def check_blocks(sizes, seeds: int, tmp: Path) -> Tuple[int, int, int, List[str]]:
+    """Volume colocado em blocos contra caixa a caixa.
+
+    Retorna (casos, com o mesmo volume, com outras posições, falhas).
+    """
+    total, equal, moved, failures = 0, 0, 0, []
+    for axes in ROTATION_SETS:
+        for name, trailer, inventory in load_cases(sizes, seeds, axes, tmp / "+".join(axes)):
+            total += 1
+            per_box_placed = pack_grouped_corrected(trailer, inventory, block=False)[0]
+            block_placed = pack_grouped_corrected(trailer, inventory, block=True)[0]
+            if sorted(_placements(block_placed)) != sorted(_placements(per_box_placed)):
+                moved += 1
+            per_box = sum(b.volume for b in per_box_placed)
+            block = sum(b.volume for b in block_placed)
+            if block < per_box * (1 - VOLUME_TOL):
+                failures.append(f"blocos {name} {'+'.join(axes)}: {block:.3f} m³, caixa a caixa {per_box:.3f} m³")
+            elif block <= per_box * (1 + VOLUME_TOL):
+                equal += 1
+    return total, equal, moved, failures
+
+def _plan_errors(placed, unplaced: BoxInventory, expected: int, trailer: Trailer) -> List[str]:
+    """Caixas perdidas, sobrepostas ou acima do teto num plano"""
+    errors = []
+    if len(placed) + len(unplaced) != expected:
+        errors.append(f"{len(placed)} colocadas + {len(unplaced)} de fora, esperadas {expected}")
+    cubes = sorted((b.pos[0], b.pos[1], b.pos[2], b.pos[0] + b.c, b.pos[1] + b.l, b.pos[2] + b.a, b.id)
+                   for b in placed)
+    for i, a in enumerate(cubes):
+        if a[5] > trailer.a + HEIGHT_EPS:
+            errors.append(f"caixa {a[6]} acima do teto ({a[5]:.3f} m)")
+        for b in cubes[i + 1:]:
+            if b[0] >= a[3] - POS_TOL:
+                break
+            if all(b[k] < a[k + 3] - POS_TOL and a[k] < b[k + 3] - POS_TOL for k in (1, 2)):
+                errors.append(f"caixas {a[6]} e {b[6]} sobrepostas")
+    return errors
+
+def check_incremental(cases) -> Tuple[int, List[float], List[float], List[str]]:
+    """Plano incremental contra passadas completas.
+
+    Retorna (casos, diferença relativa de volume depois de ``remove`` sem e
+    com ``refill``, falhas).
+    """
+    total, plain, refilled, failures = 0, [], [], []
+    for name, trailer, inventory in cases:
+        total += 1
+        groups, half = inventory.groups, len(inventory.groups) // 2
+        plan = IncrementalPlan(trailer, BoxInventory(groups[:half]))
+        plan.add(BoxInventory(groups[half:]))
+        full = pack_grouped_corrected(trailer, inventory, block=True)[0]
+        if not set(_placements(full)) <= set(_placements(plan.placed)):
+            failures.append(f"incremental {name}: add não colocou tudo o que a passada completa coloca")
+
+        skus = sorted({r.sku for r in inventory.rows()})
+        gone = set(random.Random(name).sample(skus, max(1, len(skus) // REMOVE_SHARE)))
+        rest = BoxInventory([rows for rows in ([r for r in g if r.sku not in gone] for g in groups) if rows])
+        replan = sum(b.volume for b in pack_grouped_corrected(trailer, rest, block=True)[0])
+        for refill, diffs in ((False, plain), (True, refilled)):
+            plan = IncrementalPlan(trailer, inventory)
+            plan.remove(gone, refill=refill)
+            label = "remove com refill" if refill else "remove"
+            failures += [f"incremental {name} ({label}): {e}"
+                         for e in _plan_errors(plan.placed, plan.unplaced, len(rest), trailer)]
+            if replan:
+                diffs.append(sum(b.volume for b in plan.placed) / replan - 1)
+    return total, plain, refilled, failures
+
+def _spread(diffs: List[float]) -> str:
+    if not diffs:
+        return "sem cargas"
+    return f"{min(diffs):+.1%} a {max(diffs):+.1%} (média {sum(diffs) / len(diffs):+.1%})"
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--sizes", nargs="+", choices=list(synthetic.PROFILES), default=["small", "medium"])
+    p.add_argument("--seeds", type=int, default=5, help="sementes por perfil")
+    p.add_argument("--camadas", type=int, default=300, help="camadas aleatórias na verificação da skyline")
+    args = p.parse_args(argv)
+
+    failures = []
+    n, ties, found = check_skyline(args.camadas)
+    print(f"skyline: {n} camadas ({ties} encerradas em empate de orientação), "
+          f"{len(found)} divergências", file=sys.stderr)
+    failures += found
+
+    with tempfile.TemporaryDirectory() as tmp:
+        n, over_roof, found = check_per_box(load_cases(args.sizes, args.seeds, ["XY"], Path(tmp)), Path(tmp))
+        print(f"caixa a caixa: {n} cargas ({over_roof} com a referência acima do teto, ignoradas), "
+              f"{len(found)} divergências", file=sys.stderr)
+        failures += found
+
+        n, equal, moved, found = check_blocks(args.sizes, args.seeds, Path(tmp))
+        print(f"blocos: {n} cargas ({equal} com o mesmo volume, {moved} com outras posições), "
+              f"{len(found)} com menos volume", file=sys.stderr)
+        failures += found
+
+        n, plain, refilled, found = check_incremental(load_cases(args.sizes, args.seeds, ["XY"], Path(tmp) / "incremental"))
+        print(f"incremental: {n} cargas; volume depois de remove contra a passada completa: "
+              f"{_spread(plain)}, com refill {_spread(refilled)}; {len(found)} falhas", file=sys.stderr)
+        failures += found
+
+    for f in failures:
+        print(f"DIVERGÊNCIA {f}", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,157 @@
+"""Motor de referência: o empacotamento original, caixa a caixa e por varredura linear.
+
+Cópia do ``SkylineLayer`` e do ``pack_grouped_corrected`` da versão
+inicial do ``streamlit_app.py``, com uma única correção: a checagem de
+altura ao abrir uma camada nova fazia ``max([...], default=[0])[0]``, que
+quebra assim que a lista não é vazia. Serve de gabarito para
+``benchmarks.check_reference``; não deve ser otimizado nem corrigido.
+"""
+from typing import List, Tuple
+
+from cubagem.engine import BoxInventory, Trailer
+
+class Box:
+    def __init__(self, sku: str, c: float, l: float, a: float, rotation_axes: List[str] = None):
+        self.id = sku
+        self.original_c, self.original_l, self.original_a = c, l, a
+        self.c, self.l, self.a = c, l, a
+        self.pos: Tuple[float, float, float] | None = None
+        self.rotation_axes = rotation_axes or ['XY']
+        self.used_orientation = None
+
+    def orientations(self):
+        """Retorna orientações possíveis como (largura_base, profundidade_base) mantendo altura fixa"""
+        orientations = []
+
+        # Orientação original (comprimento x largura)
+        orientations.append((self.original_c, self.original_l))
+
+        # Rotação XY (largura x comprimento) - apenas troca no plano horizontal
+        if 'XY' in self.rotation_axes:
+            orientations.append((self.original_l, self.original_c))
+
+        # Para rotações verticais, precisamos considerar altura também
+        if 'XZ' in self.rotation_axes:
+            # Comprimento vira altura, altura vira comprimento
+            orientations.append((self.original_a, self.original_l))
+            orientations.append((self.original_l, self.original_a))
+
+        if 'YZ' in self.rotation_axes:
+            # Largura vira altura, altura vira largura
+            orientations.append((self.original_c, self.original_a))
+            orientations.append((self.original_a, self.original_c))
+
+        # Remove duplicatas
+        unique_orientations = list(set(orientations))
+        return unique_orientations
+
+    @property
+    def volume(self):
+        return self.original_c * self.original_l * self.original_a
+
+class SkylineLayer:
+    """Algoritmo Skyline original - corrigido e funcional"""
+    def __init__(self, C: float, L: float):
+        self.C, self.L = C, L
+        self.sky = [(0.0, 0.0, C)]
+
+    def place(self, b: Box):
+        """Tenta todas as orientações da caixa e escolhe a melhor posição"""
+        best_position = None
+        best_orientation = None
+        best_waste = float('inf')
+
+        for w, d in b.orientations():
+            # Verifica todas as posições possíveis na skyline
+            for i, (x, y, fx) in enumerate(self.sky):
+                if w <= fx and y + d <= self.L:
+                    # Calcula desperdício de espaço
+                    waste = fx - w
+                    if waste < best_waste:
+                        best_waste = waste
+                        best_position = i
+                        best_orientation = (w, d)
+
+        if best_position is not None:
+            i = best_position
+            w, d = best_orientation
+            x, y, fx = self.sky[i]
+
+            # Atualiza dimensões da caixa para a orientação escolhida
+            altura_atual = b.original_a
+            if 'XZ' in b.rotation_axes and (w == b.original_a or d == b.original_a):
+                if w == b.original_a and d == b.original_l:
+                    altura_atual = b.original_c
+                elif w == b.original_l and d == b.original_a:
+                    altura_atual = b.original_c
+            elif 'YZ' in b.rotation_axes and (w == b.original_a or d == b.original_a):
+                if w == b.original_c and d == b.original_a:
+                    altura_atual = b.original_l
+                elif w == b.original_a and d == b.original_c:
+                    altura_atual = b.original_l
+
+            # Atualiza a skyline
+            self.sky[i] = (x + w, y, fx - w)
+            self.sky.append((x, y + d, w))
+
+            # Limpa entradas inválidas da skyline
+            self.sky = [(sx, sy, sfw) for sx, sy, sfw in self.sky if sfw > 0]
+
+            # Atualiza dimensões da caixa
+            b.c, b.l, b.a = w, d, altura_atual
+            b.used_orientation = f"{w:.2f}x{d:.2f}x{altura_atual:.2f}"
+
+            return True, (x, y)
+
+        return False, None
+
+def pack_grouped_corrected(trailer: Trailer, sku_groups: List[List[Box]]):
+    """Algoritmo de empacotamento original corrigido com rotações"""
+    placed: List[Box] = []
+    unplaced: List[Box] = []
+    z = 0.0
+    layer = SkylineLayer(trailer.c, trailer.l)
+    layer_h = 0.0
+
+    for g_idx, group in enumerate(sku_groups):
+        # Ordena por área da base (maior primeiro)
+        group.sort(key=lambda b: max([w*d for w, d in b.orientations()]), reverse=True)
+        idx = 0
+
+        while idx < len(group):
+            b = group[idx]
+            ok, pos = layer.place(b)
+
+            if ok:
+                b.pos = (*pos, z)
+                placed.append(b)
+                layer_h = max(layer_h, b.a)
+                idx += 1
+            else:
+                # Se não coube, tenta próxima camada
+                if layer_h == 0.0:
+                    # Se nem o primeiro item coube, marca como não colocado
+                    unplaced.extend(group[idx:])
+                    idx = len(group)
+                else:
+                    # Nova camada
+                    z += layer_h
+                    if z + max([b.a for b in group[idx:] if hasattr(b, 'a')], default=0) > trailer.a:
+                        # Não cabe mais em altura
+                        unplaced.extend(group[idx:])
+                        # Adiciona todos os grupos restantes
+                        for rest_group in sku_groups[g_idx + 1:]:
+                            unplaced.extend(rest_group)
+                        return placed, unplaced
+
+                    layer = SkylineLayer(trailer.c, trailer.l)
+                    layer_h = 0.0
+
+    return placed, unplaced
+
+def boxes_from_inventory(inventory: BoxInventory) -> List[List[Box]]:
+    """Grupos de caixas da referência, um ``Box`` por unidade (como o ``expand`` original)"""
+    return [
+        [Box(f"{r.sku}-{r.first + k}", r.c, r.l, r.a, list(r.rotation_axes)) for r in group for k in range(r.count)]
+        for group in inventory.groups
+    ]
@@ -0,0 +1,87 @@
+"""Gerador determinístico de planilhas de carregamento e de medidas.
+
+As famílias têm caixas de papelão com dimensões em torno de tamanhos
+comerciais, tamanhos (P/M/G...) que escalam a caixa, e QMM (quantidade por
+caixa master) variando por tamanho. O carregamento pede quantidades que
+nem sempre são múltiplas do QMM, como nos pedidos reais.
+"""
+import csv
+import random
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+MEASURES_COLUMNS = ["COD FAMILIA", "COD TAMANHO", "QMM", "ALTURA", "LARGURA", "COMPRIMENTO"]
+LOADING_COLUMNS = ["COD SKU", "DESCRICAO", "QTDE", "QMM"]
+
+# Perfis de carga: número de SKUs, caixas por SKU e trailer usado no teste
+PROFILES = {
+    "small": {"skus": 25, "boxes_per_sku": (2, 40), "trailer": (13.6, 2.45, 2.5)},
+    "medium": {"skus": 250, "boxes_per_sku": (5, 80), "trailer": (13.6, 2.45, 2.5)},
+    # Trailer "alto" para que a carga inteira passe pelo empacotador
+    "large": {"skus": 2500, "boxes_per_sku": (10, 160), "trailer": (13.6, 2.45, 120.0)},
+}
+
+SIZES = ["PP", "P", "M", "G", "GG"]
+
+def generate(profile: str, seed: int = 0) -> Tuple[List[Dict], List[Dict]]:
+    """Retorna (linhas de carregamento, linhas de medidas) para o perfil"""
+    cfg = PROFILES[profile]
+    rnd = random.Random(f"{profile}-{seed}")
+    loading: List[Dict] = []
+    measures: List[Dict] = []
+    n_families = max(1, cfg["skus"] // 4)
+    families = []
+    for f in range(n_families):
+        # Caixa base da família (m): comprimento >= largura, altura mais baixa
+        c = round(rnd.lognormvariate(-1.0, 0.35), 2)
+        l = round(min(c, rnd.lognormvariate(-1.25, 0.3)), 2)
+        a = round(rnd.lognormvariate(-1.35, 0.35), 2)
+        families.append((10000 + f, max(c, 0.08), max(l, 0.08), max(a, 0.05)))
+
+    seen = set()
+    while len(loading) < cfg["skus"]:
+        fam, c, l, a = rnd.choice(families)
+        s = rnd.randrange(len(SIZES))
+        size = SIZES[s]
+        scale = 0.85 + 0.1 * s
+        qmm = rnd.choice([1, 2, 4, 6, 6, 12, 12, 24])
+        key = (fam, size, qmm)
+        if key not in seen:
+            seen.add(key)
+            measures.append({
+                "COD FAMILIA": fam, "COD TAMANHO": size, "QMM": qmm,
+                "ALTURA": round(a * scale, 2), "LARGURA": round(l * scale, 2),
+                "COMPRIMENTO": round(c * scale, 2),
+            })
+        boxes = rnd.randint(*cfg["boxes_per_sku"])
+        qtde = max(1, boxes * qmm - rnd.randint(0, qmm - 1))
+        color = rnd.randint(1, 40)
+        loading.append({"COD SKU": f"{fam}-C{color:02d}-{size}", "DESCRICAO": f"ITEM {fam}/{color}",
+                        "QTDE": qtde, "QMM": qmm})
+    return loading, measures
+
+def write_csv(rows: List[Dict], columns: List[str], path: Path) -> Path:
+    with open(path, "w", newline="") as fh:
+        w = csv.DictWriter(fh, fieldnames=columns)
+        w.writeheader()
+        w.writerows(rows)
+    return path
+
+def write_xlsx(rows: List[Dict], columns: List[str], path: Path) -> Path:
+    import openpyxl
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(columns)
+    for r in rows:
+        ws.append([r[c] for c in columns])
+    wb.save(path)
+    return path
+
+def write_tables(profile: str, out_dir: Path, seed: int = 0, fmt: str = "xlsx") -> Tuple[Path, Path]:
+    """Grava as duas planilhas do perfil; retorna (carregamento, medidas)"""
+    loading, measures = generate(profile, seed)
+    writer = write_xlsx if fmt == "xlsx" else write_csv
+    out_dir.mkdir(parents=True, exist_ok=True)
+    return (writer(loading, LOADING_COLUMNS, out_dir / f"carregamento-{profile}-{seed}.{fmt}"),
+            writer(measures, MEASURES_COLUMNS, out_dir / f"medidas-{profile}-{seed}.{fmt}"))
@@ -0,0 +1,39 @@
+"""Cubagem inteligente: motor de empacotamento de caixas em trailers.
+
+Os nomes públicos são carregados sob demanda, para que ``import cubagem``
+(e a linha de comando) não pague o custo de pandas ou openpyxl.
+"""
+from importlib import import_module
+
+_EXPORTS = {
+    "Diagnostics": "diagnostics",
+    "Box": "engine",
+    "SkuRow": "engine",
+    "BoxInventory": "engine",
+    "Trailer": "engine",
+    "SkylineLayer": "engine",
+    "pack_grouped_corrected": "engine",
+    "analyze_packing_efficiency": "engine",
+    "packing_bounds": "bounds",
+    "pack_extreme_points": "extreme_point",
+    "IncrementalPlan": "incremental",
+    "PatternCache": "patterns",
+    "Plan": "planfile",
+    "write_plan": "planfile",
+    "JobQueue": "jobs",
+    "load_files": "ingest",
+    "expand_grouped_with_rotation": "ingest",
+    "read_measures_index": "ingest",
+    "stream_inventory": "ingest",
+    "run_simulation": "simulation",
+    "Scenario": "sweep",
+    "run_sweep": "sweep",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
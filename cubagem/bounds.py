@@ -0,0 +1,112 @@
+"""Limites para o empacotamento: quanto um plano ainda pode melhorar.
+
+Para um inventário e um trailer, ``packing_bounds`` calcula o maior volume
+que algum plano conseguiria colocar e a menor altura com que todas as
+caixas que cabem poderiam ser colocadas:
+
+- volumétrico: volume das caixas sobre a área do piso (altura) e o menor
+  entre o volume das caixas que cabem e o volume do trailer (volume);
+- geométrico: a caixa que, na orientação mais baixa que cabe, é a mais
+  alta; e a pilha das caixas "largas", que em toda orientação que cabe
+  passam da metade do comprimento e da largura do piso e por isso não
+  podem ficar lado a lado.
+
+``fleet_bound`` dá o mínimo de veículos de uma frota: pelo volume e pelas
+caixas que passam da metade de todas as dimensões do veículo (duas delas
+nunca cabem juntas). Um plano que alcança os limites é ótimo, e a busca
+pode parar nele.
+"""
+from typing import List, Sequence, Tuple
+
+from .engine import BoxInventory, Orientation, SkuRow, Trailer
+
+FIT_EPS = 1e-9      # folga de arredondamento ao comparar medidas
+REL_TOL = 1e-9      # tolerância relativa para considerar um limite alcançado
+
+def fitting_orientations(row: SkuRow, trailer: Trailer) -> List[Orientation]:
+    """Orientações da linha que cabem no trailer"""
+    return [(w, d, h) for w, d, h in row.orientations()
+            if w <= trailer.c + FIT_EPS and d <= trailer.l + FIT_EPS and h <= trailer.a + FIT_EPS]
+
+class PackingBounds:
+    def __init__(self, trailer: Trailer, volume: float, height: float):
+        self.trailer = trailer
+        self.volume = volume        # maior volume colocável
+        self.height = height        # menor altura para todas as caixas que cabem
+
+    @property
+    def volume_efficiency(self) -> float:
+        """Maior taxa de ocupação possível (%)"""
+        return self.volume / self.trailer.volume * 100 if self.trailer.volume > 0 else 0.0
+
+    @property
+    def may_fit(self) -> bool:
+        """Pelos limites, todas as caixas que cabem podem ir juntas no trailer"""
+        return self.height <= self.trailer.a + FIT_EPS
+
+    @property
+    def height_usage(self) -> float:
+        """Menor altura utilizada possível (%) quando todas as caixas que cabem são colocadas"""
+        return min(self.height / self.trailer.a * 100, 100.0) if self.trailer.a > 0 else 0.0
+
+    def reached(self, volume: float, height: float) -> bool:
+        """O plano com este volume colocado e esta altura usada é ótimo?
+
+        Alcançado o limite de volume, ou o trailer está cheio ou todas as
+        caixas que cabem foram colocadas; nos dois casos o limite de altura
+        vale para o plano.
+        """
+        return (volume >= self.volume * (1 - REL_TOL)
+                and height <= self.height * (1 + REL_TOL) + FIT_EPS)
+
+    def gap(self, volume: float, height: float) -> Tuple[float, float]:
+        """Distância do plano aos limites, em pontos percentuais (ocupação, altura)"""
+        efficiency = volume / self.trailer.volume * 100 if self.trailer.volume > 0 else 0.0
+        usage = height / self.trailer.a * 100 if self.trailer.a > 0 else 0.0
+        return (max(self.volume_efficiency - efficiency, 0.0), max(usage - self.height_usage, 0.0))
+
+def packing_bounds(inventory: BoxInventory, trailer: Trailer) -> PackingBounds:
+    """Limites volumétricos e geométricos do inventário neste trailer"""
+    floor = trailer.c * trailer.l
+    half_c, half_l = trailer.c / 2, trailer.l / 2
+    fit_volume = tallest = wide_stack = 0.0
+    for row in inventory.rows():
+        options = fitting_orientations(row, trailer) if row.count > 0 else None
+        if not options:
+            continue
+        fit_volume += row.count * row.unit_volume
+        lowest = min(h for _, _, h in options)
+        tallest = max(tallest, lowest)
+        if all(w > half_c + FIT_EPS and d > half_l + FIT_EPS for w, d, _ in options):
+            wide_stack += row.count * lowest
+    height = max(fit_volume / floor if floor > 0 else 0.0, tallest, wide_stack)
+    return PackingBounds(trailer, min(fit_volume, trailer.volume), height)
+
+def fleet_bound(inventory: BoxInventory, trailers: Sequence[Trailer]) -> int:
+    """Mínimo de veículos de ``trailers`` (cada item é um veículo) para as caixas que cabem em algum"""
+    fit_volume, big = 0.0, 0
+    for row in inventory.rows():
+        if row.count <= 0:
+            continue
+        fits_any, always_big = False, True
+        for t in trailers:
+            options = fitting_orientations(row, t)
+            if not options:
+                continue
+            fits_any = True
+            if not all(w > t.c / 2 + FIT_EPS and d > t.l / 2 + FIT_EPS and h > t.a / 2 + FIT_EPS
+                       for w, d, h in options):
+                always_big = False
+        if fits_any:
+            fit_volume += row.count * row.unit_volume
+            if always_big:
+                big += row.count
+
+    # Pelo volume: os maiores veículos primeiro
+    by_volume, capacity = 0, 0.0
+    for volume in sorted((t.volume for t in trailers), reverse=True):
+        if capacity >= fit_volume * (1 - REL_TOL):
+            break
+        capacity += volume
+        by_volume += 1
+    return max(by_volume, big)
@@ -0,0 +1,153 @@
+"""Linha de comando: empacota um diretório de carregamentos em lote.
+
+Exemplo::
+
+    python -m cubagem cargas/ --medidas medidas.xlsx --trailer 13.6 2.45 2.5 \
+        --rotacoes XY XZ --motor pontos --formato jsonl --saida resultados.jsonl
+
+Cada carregamento vira uma linha (JSON ou CSV) gravada assim que termina.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+
+from .bounds import packing_bounds
+from .diagnostics import NULL_DIAGNOSTICS, Diagnostics
+from .engine import Trailer, analyze_packing_efficiency, pack_grouped_corrected
+from .extreme_point import pack_extreme_points
+from .ingest import read_measures_index, stream_inventory
+from .optimizer import optimize_packing
+from .patterns import DEFAULT_PATH, PatternCache
+
+SUPPORTED_SUFFIXES = (".xlsx", ".csv")
+PACKERS = {"camadas": pack_grouped_corrected, "pontos": pack_extreme_points}
+RESULT_FIELDS = ["arquivo", "total_boxes", "placed_boxes", "unplaced_boxes", "missing_skus",
+                 "volume_efficiency", "height_usage", "max_height_used", "volume_efficiency_bound",
+                 "height_usage_bound", "elapsed_s", "diagnostics", "error"]
+
+
+def _load_sources(paths):
+    for p in map(Path, paths):
+        if p.is_dir():
+            yield from sorted(f for f in p.iterdir() if f.suffix.lower() in SUPPORTED_SUFFIXES)
+        else:
+            yield p
+
+
+def pack_file(path, measures, trailer: Trailer, rotation_axes, block: bool = True,
+              time_budget: float = 0.0, diagnostics: Diagnostics = NULL_DIAGNOSTICS,
+              packer=pack_grouped_corrected, patterns: PatternCache | None = None):
+    """Empacota um carregamento; retorna (resumo, caixas colocadas)"""
+    extra = {"patterns": patterns} if patterns is not None else {}
+    start = time.perf_counter()
+    with diagnostics.stage("stream_inventory"):
+        inventory, missing = stream_inventory(path, measures, rotation_axes)
+    total = len(inventory)
+    with diagnostics.stage("pack"):
+        if time_budget > 0:
+            result = optimize_packing(trailer, inventory, time_budget=time_budget, block=block,
+                                      diagnostics=diagnostics, packer=packer, patterns=patterns)
+            placed, unplaced, bounds = result.placed, result.unplaced, result.bounds
+        else:
+            placed, unplaced = packer(trailer, inventory, block=block, diagnostics=diagnostics, **extra)
+            bounds = packing_bounds(inventory, trailer)
+    with diagnostics.stage("analyze"):
+        analysis = analyze_packing_efficiency(placed, trailer, unplaced)
+    result = {
+        "arquivo": str(path),
+        "total_boxes": total,
+        "placed_boxes": len(placed),
+        "unplaced_boxes": len(unplaced),
+        "missing_skus": len(missing),
+        "volume_efficiency": analysis.get("volume_efficiency", 0.0),
+        "height_usage": analysis.get("height_usage", 0.0),
+        "max_height_used": analysis.get("max_height_used", 0.0),
+        "volume_efficiency_bound": bounds.volume_efficiency,
+        "height_usage_bound": bounds.height_usage,
+        "elapsed_s": time.perf_counter() - start,
+    }
+    if diagnostics.enabled:
+        result["diagnostics"] = diagnostics.report()
+    return result, placed
+
+
+def _write_boxes(path: Path, placed):
+    with open(path, "w", newline="") as fh:
+        w = csv.writer(fh)
+        w.writerow(["id", "x", "y", "z", "c", "l", "a"])
+        for b in placed:
+            w.writerow([b.id, *b.pos, b.c, b.l, b.a])
+
+
+def build_parser():
+    p = argparse.ArgumentParser(prog="cubagem", description="Empacotamento de carregamentos em lote")
+    p.add_argument("cargas", nargs="+", help="planilhas de carregamento (.xlsx/.csv) ou diretórios")
+    p.add_argument("--medidas", required=True, help="planilha de medidas (.xlsx/.csv)")
+    p.add_argument("--trailer", nargs=3, type=float, default=[13.6, 2.45, 2.5],
+                   metavar=("C", "L", "A"), help="dimensões do trailer em metros")
+    p.add_argument("--rotacoes", nargs="+", choices=["XY", "XZ", "YZ"], default=["XY"])
+    p.add_argument("--motor", choices=list(PACKERS), default="camadas",
+                   help="camadas (skyline, rápido) ou pontos (pontos extremos 3D, mais denso)")
+    p.add_argument("--caixa-a-caixa", action="store_true", help="desliga o empacotamento em blocos")
+    p.add_argument("--otimizar", type=float, default=0.0, metavar="SEG",
+                   help="tempo de otimização multi-start por carregamento (0 = guloso)")
+    p.add_argument("--diagnostico", action="store_true",
+                   help="inclui tempos por etapa e contadores do motor em cada resultado")
+    p.add_argument("--padroes", nargs="?", const=str(DEFAULT_PATH), metavar="ARQUIVO",
+                   help="reaproveita padrões de camada deste cache SQLite (motor camadas; "
+                        f"padrão: {DEFAULT_PATH})")
+    p.add_argument("--formato", choices=["jsonl", "csv"], default="jsonl")
+    p.add_argument("--saida", help="arquivo de resultados (padrão: saída padrão)")
+    p.add_argument("--caixas", help="diretório para gravar as posições das caixas por carregamento")
+    p.add_argument("--planos", help="diretório para gravar o plano binário (.cubplan) de cada carregamento")
+    return p
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    trailer = Trailer(*args.trailer)
+    measures = read_measures_index(args.medidas)
+    boxes_dir = Path(args.caixas) if args.caixas else None
+    patterns = PatternCache(args.padroes) if args.padroes and args.motor == "camadas" else None
+    plans_dir = Path(args.planos) if args.planos else None
+    if plans_dir:
+        from .planfile import write_plan    # numpy só é carregado quando há planos para gravar
+    for d in (boxes_dir, plans_dir):
+        if d:
+            d.mkdir(parents=True, exist_ok=True)
+
+    out = open(args.saida, "w", newline="") if args.saida else sys.stdout
+    writer = None
+    if args.formato == "csv":
+        writer = csv.DictWriter(out, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+
+    failures = 0
+    try:
+        for path in _load_sources(args.cargas):
+            try:
+                result, placed = pack_file(path, measures, trailer, args.rotacoes,
+                                           block=not args.caixa_a_caixa, time_budget=args.otimizar,
+                                           diagnostics=Diagnostics() if args.diagnostico else NULL_DIAGNOSTICS,
+                                           packer=PACKERS[args.motor], patterns=patterns)
+                if boxes_dir:
+                    _write_boxes(boxes_dir / f"{path.stem}.csv", placed)
+                if plans_dir:
+                    write_plan(plans_dir / f"{path.stem}.cubplan", placed, trailer)
+            except Exception as e:
+                failures += 1
+                result = {"arquivo": str(path), "error": f"{type(e).__name__}: {e}"}
+            if writer:
+                if "diagnostics" in result:
+                    result["diagnostics"] = json.dumps(result["diagnostics"])
+                writer.writerow(result)
+            else:
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failures else 0
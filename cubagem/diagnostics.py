@@ -0,0 +1,72 @@
+"""Instrumentação: tempo por etapa e contadores do motor.
+
+Desligada, use ``NULL_DIAGNOSTICS``: as mesmas chamadas viram operações
+vazias, então o custo é praticamente zero.
+"""
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Set
+
+class Diagnostics:
+    enabled = True
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}      # segundos por etapa (acumulado)
+        self.counters: Dict[str, float] = {}
+        self._peaks: Set[str] = set()           # contadores de ``peak`` (não somam)
+
+    @contextmanager
+    def stage(self, name: str, replace: bool = False):
+        """Mede o bloco; com ``replace`` guarda só a última medida"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = elapsed if replace else self.stages.get(name, 0.0) + elapsed
+
+    def count(self, name: str, n: float = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def peak(self, name: str, value: float):
+        self._peaks.add(name)
+        if value > self.counters.get(name, float('-inf')):
+            self.counters[name] = value
+
+    def merge(self, other: "Diagnostics"):
+        """Acrescenta as medidas de ``other``: etapas e contadores somam, picos ficam no maior"""
+        for name, elapsed in other.stages.items():
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+        for name, value in other.counters.items():
+            if name in other._peaks:
+                self.peak(name, value)
+            else:
+                self.count(name, value)
+
+    def report(self) -> Dict:
+        return {"stages_s": dict(self.stages), "counters": dict(self.counters)}
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.report(), **kwargs)
+
+class _NullDiagnostics:
+    enabled = False
+    _ctx = nullcontext()
+
+    def stage(self, name: str, replace: bool = False):
+        return self._ctx
+
+    def count(self, name: str, n: float = 1):
+        pass
+
+    def peak(self, name: str, value: float):
+        pass
+
+    def merge(self, other):
+        pass
+
+    def report(self) -> Dict:
+        return {}
+
+NULL_DIAGNOSTICS = _NullDiagnostics()
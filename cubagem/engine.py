@@ -0,0 +1,590 @@
+"""Motor de empacotamento: caixas, inventário, skyline e análise.
+
+Só depende da biblioteca padrão, para poder ser usado em lotes e na linha
+de comando sem carregar Streamlit, pandas ou matplotlib.
+"""
+from bisect import bisect_left, insort
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Tuple
+
+from .diagnostics import NULL_DIAGNOSTICS, Diagnostics
+
+if TYPE_CHECKING:
+    from .patterns import PatternCache
+
+# =================== ORIENTAÇÕES ===================
+Orientation = Tuple[float, float, float]    # (largura_base, profundidade_base, altura)
+# Entradas dos caches de orientação: o servidor e os processos do pool vivem
+# muito e cada medida de caixa diferente seria uma entrada para sempre
+ORIENTATION_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=ORIENTATION_CACHE_SIZE)
+def orientation_table(c: float, l: float, a: float, rotation_axes: Tuple[str, ...]) -> Tuple[Orientation, ...]:
+    """Orientações (w, d, h) permitidas para uma caixa c x l x a.
+
+    Calculada uma vez por par (dimensões, eixos) e compartilhada por todas
+    as caixas iguais. A ordem é fixa: original, XY, XZ e YZ, sem repetições.
+    """
+    candidates = [(c, l, a)]
+    if 'XY' in rotation_axes:
+        candidates.append((l, c, a))        # troca no plano horizontal
+    if 'XZ' in rotation_axes:
+        candidates += [(a, l, c), (l, a, c)]  # comprimento vira altura
+    if 'YZ' in rotation_axes:
+        candidates += [(c, a, l), (a, c, l)]  # largura vira altura
+    return tuple(dict.fromkeys(candidates))
+
+@lru_cache(maxsize=ORIENTATION_CACHE_SIZE)
+def ordered_orientations(table: Tuple[Orientation, ...], prefer: str | None) -> Tuple[Orientation, ...]:
+    """Tabela na ordem de tentativa de ``ORIENTATION_PREFS[prefer]`` (estável)"""
+    if prefer is None:
+        return table
+    return tuple(sorted(table, key=lambda o: ORIENTATION_PREFS[prefer](*o)))
+
+# =================== CLASSES CORRIGIDAS ===================
+class Box:
+    """Caixa posicionada; só é materializada quando entra no trailer"""
+    __slots__ = ('sku', 'index', 'original_c', 'original_l', 'original_a',
+                 'c', 'l', 'a', 'pos', 'rotation_axes')
+
+    def __init__(self, sku: str, c: float, l: float, a: float, rotation_axes: List[str] = None,
+                 index: int | None = None):
+        self.sku, self.index = sku, index
+        self.original_c, self.original_l, self.original_a = c, l, a
+        self.c, self.l, self.a = c, l, a
+        self.pos: Tuple[float, float, float] | None = None
+        self.rotation_axes = tuple(rotation_axes or ('XY',))
+
+    @property
+    def id(self) -> str:
+        return self.sku if self.index is None else f"{self.sku}-{self.index}"
+
+    @property
+    def used_orientation(self) -> str | None:
+        if self.pos is None:
+            return None
+        return f"{self.c:.2f}x{self.l:.2f}x{self.a:.2f}"
+
+    def orientations(self) -> Tuple[Orientation, ...]:
+        """Orientações possíveis como (largura_base, profundidade_base, altura)"""
+        return orientation_table(self.original_c, self.original_l, self.original_a, self.rotation_axes)
+
+    @property
+    def volume(self):
+        return self.original_c * self.original_l * self.original_a
+
+class SkuRow:
+    """Linha do inventário: ``count`` caixas idênticas de um SKU"""
+    __slots__ = ('sku', 'c', 'l', 'a', 'count', 'first', 'rotation_axes')
+
+    def __init__(self, sku: str, c: float, l: float, a: float, count: int,
+                 first: int = 1, rotation_axes: List[str] = None):
+        self.sku, self.c, self.l, self.a = sku, c, l, a
+        self.count, self.first = count, first
+        self.rotation_axes = tuple(rotation_axes or ('XY',))
+
+    def box(self, k: int = 0) -> Box:
+        """Materializa a k-ésima caixa da linha"""
+        return Box(self.sku, self.c, self.l, self.a, self.rotation_axes, self.first + k)
+
+    def orientations(self) -> Tuple[Orientation, ...]:
+        return orientation_table(self.c, self.l, self.a, self.rotation_axes)
+
+    def tail(self, k: int) -> "SkuRow":
+        """Linha com as caixas a partir da k-ésima"""
+        return SkuRow(self.sku, self.c, self.l, self.a, self.count - k, self.first + k, self.rotation_axes)
+
+    @property
+    def unit_volume(self) -> float:
+        return self.c * self.l * self.a
+
+class BoxInventory:
+    """Inventário colunar: grupos de SKU, cada um com linhas (dimensões, quantidade)"""
+    def __init__(self, groups: List[List[SkuRow]] | None = None):
+        self.groups: List[List[SkuRow]] = groups if groups is not None else []
+
+    def __len__(self):
+        return sum(r.count for g in self.groups for r in g)
+
+    def __iter__(self):
+        return iter(self.groups)
+
+    def rows(self):
+        for g in self.groups:
+            yield from g
+
+    @property
+    def volume(self) -> float:
+        return sum(r.count * r.unit_volume for r in self.rows())
+
+    def boxes(self) -> List[Box]:
+        """Materializa todas as caixas (uso pontual; evite em cargas grandes)"""
+        return [r.box(k) for r in self.rows() for k in range(r.count)]
+
+    def summary(self) -> List[Dict]:
+        """Resumo por SKU e dimensões, sem materializar caixas"""
+        totals: Dict[Tuple[str, str, str], int] = {}
+        for r in self.rows():
+            if r.count <= 0:
+                continue
+            key = (r.sku.split('-')[0], f"{r.c:.2f}x{r.l:.2f}x{r.a:.2f}", f"{r.unit_volume:.3f} m³")
+            totals[key] = totals.get(key, 0) + r.count
+        return [
+            {"SKU": s, "Dimensões Originais": dims, "Volume": vol, "Quantidade": n}
+            for (s, dims, vol), n in totals.items()
+        ]
+
+class Trailer:
+    def __init__(self, c: float, l: float, a: float):
+        self.c, self.l, self.a = c, l, a
+
+    @property
+    def volume(self):
+        return self.c * self.l * self.a
+
+WIDTH_EPS = 1e-9       # sobras mais estreitas que isto são arredondamento e saem da skyline
+
+class SkylineLayer:
+    """Skyline indexado: segmentos livres ordenados por largura livre.
+
+    Cada segmento (x, y, fx) representa a faixa livre [x, x + fx] x [y, L].
+    O índice ``(fx, seq)`` permite achar o best-fit por busca binária, e
+    ``seq`` preserva a ordem de criação dos segmentos para desempates, de
+    modo que as posições escolhidas são as mesmas da varredura linear.
+    Com ``merge=True`` segmentos vizinhos de mesma profundidade são fundidos;
+    ``_starts`` e ``_ends`` acham os vizinhos pelas pontas, e uma ponta já
+    registrada não é sobrescrita.
+    ``prefer`` (uma chave de ``ORIENTATION_PREFS``) muda a ordem em que as
+    orientações são tentadas, o que decide os empates de desperdício.
+    """
+    def __init__(self, C: float, L: float, merge: bool = False, prefer: str | None = None):
+        self.C, self.L = C, L
+        self.merge = merge
+        self.prefer = prefer
+        self._segs: Dict[int, List[float]] = {}     # seq -> [x, y, fx]
+        self._index: List[Tuple[float, int]] = []   # (fx, seq) ordenado
+        self._starts: Dict[Tuple[float, float], int] = {}  # (y, x) -> seq
+        self._ends: Dict[Tuple[float, float], int] = {}    # (y, x + fx) -> seq
+        self._next_seq = 0
+        self.attempts = 0               # buscas de posição (para diagnóstico)
+        self.orientations_tried = 0
+        self._insert(0.0, 0.0, C)
+
+    @classmethod
+    def from_segments(cls, C: float, L: float, segments: List[Tuple[float, float, float]],
+                      merge: bool = False, prefer: str | None = None) -> "SkylineLayer":
+        """Skyline com os segmentos livres dados (na ordem de criação, como ``sky``)"""
+        layer = cls(C, L, merge, prefer)
+        layer._segs = {seq: [x, y, fx] for seq, (x, y, fx) in enumerate(segments)}
+        layer._index = sorted((fx, seq) for seq, (_, _, fx) in enumerate(segments))
+        layer._next_seq = len(segments)
+        if merge:
+            for seq, (x, y, fx) in enumerate(segments):
+                layer._starts.setdefault((y, x), seq)
+                layer._ends.setdefault((y, x + fx), seq)
+        return layer
+
+    @property
+    def sky(self) -> List[Tuple[float, float, float]]:
+        """Segmentos livres na ordem de criação"""
+        return [tuple(self._segs[s]) for s in sorted(self._segs)]
+
+    def _insert(self, x: float, y: float, fx: float, seq: int | None = None) -> int:
+        if seq is None:
+            seq = self._next_seq
+            self._next_seq += 1
+        self._segs[seq] = [x, y, fx]
+        insort(self._index, (fx, seq))
+        if self.merge:
+            self._starts.setdefault((y, x), seq)
+            self._ends.setdefault((y, x + fx), seq)
+        return seq
+
+    def _remove(self, seq: int) -> List[float]:
+        x, y, fx = seg = self._segs.pop(seq)
+        del self._index[bisect_left(self._index, (fx, seq))]
+        if self.merge:
+            if self._starts.get((y, x)) == seq:
+                del self._starts[(y, x)]
+            if self._ends.get((y, x + fx)) == seq:
+                del self._ends[(y, x + fx)]
+        return seg
+
+    def _best_fit(self, w: float, d: float):
+        """Menor segmento com largura >= w e profundidade livre >= d"""
+        index, segs, L = self._index, self._segs, self.L
+        i = bisect_left(index, (w, -1))
+        n = len(index)
+        while i < n:
+            fx, seq = index[i]
+            if segs[seq][1] + d <= L:
+                break
+            i += 1
+        else:
+            return None
+        # Desperdícios iguais após arredondamento: vence o segmento mais antigo
+        waste = fx - w
+        for j in range(i + 1, n):
+            fx2, seq2 = index[j]
+            if fx2 - w != waste:
+                break
+            if seq2 < seq and segs[seq2][1] + d <= L:
+                seq = seq2
+        return waste, seq
+
+    def _merge_neighbours(self, seq: int):
+        x, y, fx = self._segs[seq]
+        left = self._ends.get((y, x))
+        if left is not None:
+            lx, _, lfx = self._remove(left)
+            self._remove(seq)
+            seq = self._insert(lx, y, lfx + fx, min(left, seq))
+            x, fx = lx, lfx + fx
+        right = self._starts.get((y, x + fx))
+        if right is not None:
+            _, _, rfx = self._remove(right)
+            self._remove(seq)
+            self._insert(x, y, fx + rfx, min(seq, right))
+
+    def _choose(self, b: Box, max_h: float = float('inf')):
+        """Best-fit entre as orientações de altura <= ``max_h``: (seq, (w, d, h)) ou None"""
+        best = None
+        best_waste = float('inf')
+        orientations = ordered_orientations(b.orientations(), self.prefer)
+        self.attempts += 1
+        self.orientations_tried += len(orientations)
+        for o in orientations:
+            if o[2] > max_h:
+                continue
+            hit = self._best_fit(o[0], o[1])
+            if hit is not None and hit[0] < best_waste:
+                best_waste = hit[0]
+                best = (hit[1], o)
+        return best
+
+    def _place_brick(self, b: Box, count: int, max_h: float = float('inf')):
+        """Coloca até ``count`` cópias de ``b`` como um tijolo num só segmento.
+
+        O tijolo é preenchido por colunas ao longo da profundidade e cresce
+        para a direita enquanto o best-fit da próxima cópia continuar sendo
+        a sobra do mesmo segmento, na mesma orientação. As cópias de uma
+        coluna não passam pelo best-fit uma a uma, então as posições podem
+        diferir das da colocação caixa a caixa; o volume colocado não fica
+        abaixo dela (conferido em ``benchmarks.check_reference``).
+        Retorna (posições, (w, d, h)); posições vazia se nada couber.
+        """
+        positions: List[Tuple[float, float]] = []
+        brick = None
+        L = self.L
+        while len(positions) < count:
+            choice = self._choose(b, max_h)
+            if choice is None or (brick is not None and choice != brick):
+                break
+            brick = choice
+            seq, (w, d, _) = choice
+            x, y, fx = self._remove(seq)
+            
+            # Coluna: empilha cópias ao longo da profundidade
+            positions.append((x, y))
+            yy = y + d
+            while len(positions) < count and yy + d <= L:
+                positions.append((x, yy))
+                yy = yy + d
+            
+            # Atualiza a skyline: sobra à direita mantém a posição do segmento
+            if fx - w > WIDTH_EPS:
+                self._insert(x + w, y, fx - w, seq)
+            if w > 0:
+                top = self._insert(x, yy, w)
+                if self.merge:
+                    self._merge_neighbours(top)
+            if w <= 0 or d <= 0:
+                break
+        
+        if not positions:
+            return positions, None
+        return positions, brick[1]
+
+    def place(self, b: Box, max_h: float = float('inf')):
+        """Tenta todas as orientações da caixa e escolhe a melhor posição"""
+        positions, dims = self._place_brick(b, 1, max_h)
+        if not positions:
+            return False, None
+        
+        # Atualiza dimensões da caixa para a orientação escolhida
+        b.c, b.l, b.a = dims
+        return True, positions[0]
+
+    def place_block(self, b: Box, count: int, max_h: float = float('inf')):
+        """Coloca até ``count`` cópias idênticas de ``b`` de uma vez.
+
+        Retorna a lista de posições (x, y) e as dimensões (w, d, h) usadas.
+        """
+        return self._place_brick(b, count, max_h)
+
+# Ordem de tentativa das orientações (menor chave primeiro)
+ORIENTATION_PREFS = {
+    "largura": lambda w, d, h: -w,          # base mais larga
+    "profundidade": lambda w, d, h: -d,     # base mais funda
+    "baixa": lambda w, d, h: h,             # caixa mais deitada
+}
+
+# =================== FUNÇÕES DE CÁLCULO CORRIGIDAS ===================
+def _base_area(row: SkuRow) -> float:
+    return max(w * d for w, d, _ in row.orientations())
+
+# Critérios de ordenação das linhas dentro de um grupo (maior primeiro)
+SORT_KEYS = {
+    "area": _base_area,
+    "volume": lambda row: row.unit_volume,
+    "altura": lambda row: row.a,
+    "lado": lambda row: max(row.c, row.l),
+}
+
+def _record_layer(diagnostics: Diagnostics, layer: SkylineLayer):
+    diagnostics.count("placement_attempts", layer.attempts)
+    diagnostics.count("orientations_tried", layer.orientations_tried)
+    diagnostics.count("skyline_segments", len(layer._segs))
+    diagnostics.peak("max_layer_segments", len(layer._segs))
+
+HEIGHT_EPS = 1e-9      # folga de arredondamento no teto do trailer
+
+class Layer:
+    """Camada do empacotamento: altura de base, skyline e caixas colocadas nela"""
+    __slots__ = ('z', 'height', 'sky', 'boxes')
+
+    def __init__(self, z: float, sky: SkylineLayer):
+        self.z = z
+        self.height = 0.0
+        self.sky = sky
+        self.boxes: List[Box] = []
+
+class LayerPacker:
+    """Estado do empacotamento em camadas, que pode continuar recebendo grupos.
+
+    ``pack_grouped_corrected`` usa um só para uma passada; o plano
+    incremental (``cubagem.incremental``) o mantém entre alterações.
+    Nenhuma caixa passa do teto: cada camada só aceita orientações que
+    caibam na altura que sobra acima dela. ``closed`` indica que a altura
+    acabou: tudo o que vier depois sobra. ``on_progress(caixas, camadas)``
+    é chamado a cada grupo concluído e a cada camada aberta. Com
+    ``patterns`` (índice de ``cubagem.patterns``), cada camada nova começa
+    pelo padrão guardado que cobrir o maior trecho das próximas caixas.
+    ``merge`` liga a fusão de segmentos vizinhos nas skylines das camadas.
+    """
+    def __init__(self, trailer: Trailer, block: bool = False, sort_key: str = "area",
+                 prefer: str | None = None, diagnostics: Diagnostics = NULL_DIAGNOSTICS,
+                 on_progress: Callable[[int, int], None] | None = None, patterns=None,
+                 merge: bool = False):
+        self.trailer = trailer
+        self.block, self.sort_key, self.prefer = block, sort_key, prefer
+        self.merge = merge
+        self.diagnostics = diagnostics
+        self.on_progress = on_progress
+        self.patterns = patterns
+        self.layers: List[Layer] = []
+        self.closed = False
+        self._fresh: Layer | None = None    # camada nova que ainda não consultou os padrões
+        self.reused: Dict[int, Tuple[str, int]] = {}    # id da camada -> (chave do padrão, caixas)
+        self.open_layer(0.0)
+
+    def open_layer(self, z: float) -> Layer:
+        layer = Layer(z, SkylineLayer(self.trailer.c, self.trailer.l, merge=self.merge, prefer=self.prefer))
+        self.layers.append(layer)
+        self.diagnostics.count("layers_opened")
+        if self.patterns is not None:
+            self._fresh = layer
+        self._report()
+        return layer
+
+    def _report(self):
+        if self.on_progress is not None:
+            self.on_progress(sum(len(layer.boxes) for layer in self.layers), len(self.layers))
+
+    @property
+    def placed(self) -> List[Box]:
+        """Caixas colocadas, camada a camada (mesma ordem da colocação)"""
+        return [b for layer in self.layers for b in layer.boxes]
+
+    def put(self, layer: Layer, row: SkuRow, k: int, b: Box, max_h: float = float('inf')) -> int:
+        """Tenta colocar ``b`` (a k-ésima caixa de ``row``) na camada; retorna quantas entraram.
+
+        Com ``block`` entram de uma vez as cópias seguintes da linha que
+        couberem no mesmo tijolo. ``max_h`` limita a altura das orientações.
+        """
+        if self.block:
+            positions, dims = layer.sky.place_block(b, row.count - k, max_h)
+            for j, (x, y) in enumerate(positions):
+                nb = b if j == 0 else row.box(k + j)
+                nb.c, nb.l, nb.a = dims
+                nb.pos = (x, y, layer.z)
+                layer.boxes.append(nb)
+            if positions:
+                layer.height = max(layer.height, dims[2])
+            return len(positions)
+        ok, pos = layer.sky.place(b, max_h)
+        if not ok:
+            return 0
+        b.pos = (*pos, layer.z)
+        layer.boxes.append(b)
+        layer.height = max(layer.height, b.a)
+        return 1
+
+    @staticmethod
+    def _cursor(queue: List[List[SkuRow]], g_idx: int, r_idx: int, k: int) -> Iterator[Tuple[int, int, int, SkuRow]]:
+        """Caixas que faltam a partir da posição dada: (grupo, linha, primeira caixa, linha)"""
+        for g in range(g_idx, len(queue)):
+            rows = queue[g]
+            for r in range(r_idx if g == g_idx else 0, len(rows)):
+                start = k if (g, r) == (g_idx, r_idx) else 0
+                if start < rows[r].count:
+                    yield g, r, start, rows[r]
+
+    def _reuse(self, layer: Layer, queue: List[List[SkuRow]], g_idx: int, r_idx: int, k: int):
+        """Aplica à camada vazia o padrão que cobre o maior trecho das próximas caixas.
+
+        Retorna a posição (grupo, linha, caixa) depois do trecho, ou None.
+        """
+        trailer = self.trailer
+        pattern = self.patterns.match(self._cursor(queue, g_idx, r_idx, k),
+                                      trailer.a - layer.z + HEIGHT_EPS, trailer.c * trailer.l)
+        if pattern is None:
+            return None
+        end = pattern.apply(layer, self._cursor(queue, g_idx, r_idx, k))
+        self.reused[id(layer)] = (pattern.key, len(layer.boxes))
+        self.diagnostics.count("pattern_hits")
+        self.diagnostics.count("pattern_boxes", len(layer.boxes))
+        return end
+
+    def pack(self, groups: List[List[SkuRow]]) -> BoxInventory:
+        """Empacota os grupos a partir da camada atual; retorna o que não coube"""
+        unplaced = BoxInventory()
+        trailer, diagnostics = self.trailer, self.diagnostics
+        # Ordena pelo critério escolhido (estável, como caixa a caixa)
+        queue = [sorted(group, key=SORT_KEYS[self.sort_key], reverse=True) for group in groups]
+        starts: Dict[int, Tuple[int, int]] = {}     # grupos já começados por um padrão
+        for g_idx, rows in enumerate(queue):
+            if self.closed:
+                # Adiciona todos os grupos restantes
+                unplaced.groups.extend(list(g) for g in groups[g_idx:])
+                break
+            r_idx, k = starts.pop(g_idx, (0, 0))
+            b = None
+            
+            while r_idx < len(rows):
+                row = rows[r_idx]
+                if k >= row.count:
+                    r_idx, k = r_idx + 1, 0
+                    continue
+                layer = self.layers[-1]
+                if layer is self._fresh:
+                    self._fresh = None
+                    end = self._reuse(layer, queue, g_idx, r_idx, k)
+                    if end is not None:
+                        b = None
+                        g_end, r_idx, k = end
+                        if g_end != g_idx:
+                            # O padrão terminou num grupo seguinte
+                            for g in range(g_idx + 1, g_end):
+                                starts[g] = (len(queue[g]), 0)
+                            starts[g_end] = (r_idx, k)
+                            r_idx = len(rows)
+                        continue
+                if b is None:
+                    b = row.box(k)
+                n = self.put(layer, row, k, b, trailer.a - layer.z + HEIGHT_EPS)
+                if n:
+                    b = None
+                    k += n
+                elif layer.height == 0.0:
+                    # Se nem o primeiro item coube, marca como não colocado
+                    unplaced.groups.append([row.tail(k)] + rows[r_idx + 1:])
+                    break
+                else:
+                    # Nova camada
+                    z = layer.z + layer.height
+                    _record_layer(diagnostics, layer.sky)
+                    if z + max(r.a for r in rows[r_idx:]) > trailer.a:
+                        # Não cabe mais em altura
+                        unplaced.groups.append([row.tail(k)] + rows[r_idx + 1:])
+                        self.closed = True
+                        break
+                    self.open_layer(z)
+            self._report()
+        return unplaced
+
+def pack_grouped_corrected(trailer: Trailer, inventory: BoxInventory, block: bool = False,
+                           sort_key: str = "area", prefer: str | None = None,
+                           diagnostics: Diagnostics = NULL_DIAGNOSTICS,
+                           on_progress: Callable[[int, int], None] | None = None,
+                           patterns: "PatternCache | None" = None, merge: bool = False):
+    """Algoritmo de empacotamento original corrigido com rotações.
+
+    Consome o inventário linha a linha; só as caixas colocadas são
+    materializadas. O que não couber volta como ``BoxInventory``.
+    Com ``block=True`` cada linha de caixas idênticas é colocada em
+    tijolos (vários por camada), e não caixa a caixa. ``sort_key`` escolhe
+    a ordem das linhas em cada grupo (``SORT_KEYS``) e ``prefer`` a ordem
+    das orientações (``ORIENTATION_PREFS``). Os contadores de cada camada
+    vão para ``diagnostics`` quando ela é fechada, e
+    ``on_progress(caixas colocadas, camadas)`` acompanha a passada. Com
+    ``patterns`` as camadas reaproveitam padrões já resolvidos desse piso e,
+    no fim, as camadas desta passada são gravadas nele. ``merge=True`` funde
+    segmentos vizinhos de mesma profundidade na skyline, o que abre faixas
+    mais largas (as posições deixam de ser as do modo padrão).
+    """
+    index = None
+    if patterns is not None:
+        with diagnostics.stage("patterns_load"):
+            index = patterns.index(trailer)
+    packer = LayerPacker(trailer, block, sort_key, prefer, diagnostics, on_progress, index, merge)
+    unplaced = packer.pack(inventory.groups)
+    if not packer.closed:
+        _record_layer(diagnostics, packer.layers[-1].sky)
+    if patterns is not None:
+        # Camadas que ficaram como o padrão aplicado não precisam ser regravadas
+        changed = [layer for layer in packer.layers
+                   if packer.reused.get(id(layer), (None, -1))[1] != len(layer.boxes)]
+        reused = [key for key, n in packer.reused.values()]
+        with diagnostics.stage("patterns_save"):
+            patterns.save(trailer, changed, reused)
+    return packer.placed, unplaced
+
+# =================== FUNÇÕES DE ANÁLISE ===================
+def analyze_packing_efficiency(placed: List[Box], trailer: Trailer, unplaced: BoxInventory | None = None):
+    """Analisa a eficiência do empacotamento"""
+    if not placed:
+        return {}
+    
+    # Estatísticas básicas
+    total_boxes = len(placed)
+    total_volume_used = sum(b.volume for b in placed)
+    trailer_volume = trailer.volume
+    efficiency = (total_volume_used / trailer_volume) * 100
+    
+    # Análise por altura
+    max_height = max(b.pos[2] + b.a for b in placed) if placed else 0
+    height_usage = (max_height / trailer.a) * 100
+    
+    # Análise de orientações usadas (conta por dimensões, formata no fim)
+    dims_count: Dict[Tuple[float, float, float], int] = {}
+    for box in placed:
+        if box.pos is not None:
+            key = (box.c, box.l, box.a)
+            dims_count[key] = dims_count.get(key, 0) + 1
+    orientations_used = {}
+    for (c, l, a), n in dims_count.items():
+        ori = f"{c:.2f}x{l:.2f}x{a:.2f}"
+        orientations_used[ori] = orientations_used.get(ori, 0) + n
+    
+    analysis = {
+        'total_boxes': total_boxes,
+        'volume_efficiency': efficiency,
+        'height_usage': height_usage,
+        'max_height_used': max_height,
+        'orientations_used': orientations_used
+    }
+    if unplaced is not None:
+        analysis['unplaced_boxes'] = len(unplaced)
+        analysis['unplaced_volume'] = unplaced.volume
+    return analysis
@@ -0,0 +1,329 @@
+"""Motor 3D por pontos extremos, alternativa às camadas de ``engine``.
+
+Cada caixa vai para um ponto extremo: um canto livre criado pelas caixas
+já colocadas (à frente, ao lado e em cima de cada uma). Como não há
+camadas, uma caixa baixa pode receber outra por cima logo em seguida, e
+o ar acima dela não se perde. Toda caixa fica dentro do trailer (altura
+inclusive) e apoiada no piso ou, em pelo menos ``MIN_SUPPORT`` da base,
+no topo de outras caixas.
+
+As caixas colocadas ficam numa grade uniforme 3D, então os testes de
+colisão e de apoio olham só as células vizinhas e continuam rápidos com
+milhares de caixas. Só depende da biblioteca padrão, como ``engine``.
+"""
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterator, List, Set, Tuple
+
+from .diagnostics import NULL_DIAGNOSTICS, Diagnostics
+from .engine import SORT_KEYS, Box, BoxInventory, Orientation, Trailer, ordered_orientations
+
+EPS = 1e-9
+MIN_SUPPORT = 0.75      # fração mínima da base apoiada fora do piso
+
+FIT, BLOCKED, UNSUPPORTED = 0, 1, 2     # resultado de ``ExtremePointPacker._check``
+
+Cuboid = Tuple[float, float, float, float, float, float]   # x0, y0, z0, x1, y1, z1
+
+class SpatialGrid:
+    """Grade uniforme 3D: cada célula guarda as caixas que a tocam"""
+    def __init__(self, cell: float):
+        self.cell = cell
+        self.cells: Dict[Tuple[int, int, int], List[int]] = {}
+        self.boxes: List[Cuboid] = []
+
+    def _span(self, lo: float, hi: float) -> range:
+        c = self.cell
+        return range(int(lo / c), int(max(lo, hi - EPS) / c) + 1)
+
+    def add(self, cub: Cuboid) -> int:
+        idx = len(self.boxes)
+        self.boxes.append(cub)
+        x0, y0, z0, x1, y1, z1 = cub
+        for i in self._span(x0, x1):
+            for j in self._span(y0, y1):
+                for k in self._span(z0, z1):
+                    self.cells.setdefault((i, j, k), []).append(idx)
+        return idx
+
+    def near(self, x0: float, y0: float, z0: float, x1: float, y1: float, z1: float) -> Iterator[Cuboid]:
+        """Caixas das células que a região toca (cada uma uma vez)"""
+        seen: Set[int] = set()
+        cells, boxes = self.cells, self.boxes
+        for i in self._span(x0, x1):
+            for j in self._span(y0, y1):
+                for k in self._span(z0, z1):
+                    for idx in cells.get((i, j, k), ()):
+                        if idx not in seen:
+                            seen.add(idx)
+                            yield boxes[idx]
+
+    def collides(self, x0: float, y0: float, z0: float, x1: float, y1: float, z1: float) -> bool:
+        # Caminho mais quente do motor: sem ``near`` (repetir uma caixa não muda a resposta)
+        cells, boxes = self.cells, self.boxes
+        xs, ys, zs = self._span(x0, x1), self._span(y0, y1), self._span(z0, z1)
+        for i in xs:
+            for j in ys:
+                for k in zs:
+                    for idx in cells.get((i, j, k), ()):
+                        bx0, by0, bz0, bx1, by1, bz1 = boxes[idx]
+                        if (x0 < bx1 - EPS and bx0 < x1 - EPS and y0 < by1 - EPS and by0 < y1 - EPS
+                                and z0 < bz1 - EPS and bz0 < z1 - EPS):
+                            return True
+        return False
+
+    def support(self, x0: float, y0: float, x1: float, y1: float, z: float) -> float:
+        """Área da base [x0, x1] x [y0, y1] apoiada em topos de caixas na altura ``z``"""
+        area = 0.0
+        for bx0, by0, _, bx1, by1, bz1 in self.near(x0, y0, z - 2 * EPS, x1, y1, z):
+            if abs(bz1 - z) <= EPS:
+                dx = min(x1, bx1) - max(x0, bx0)
+                dy = min(y1, by1) - max(y0, by0)
+                if dx > EPS and dy > EPS:
+                    area += dx * dy
+        return area
+
+    def inside(self, x: float, y: float, z: float) -> bool:
+        """O ponto está dentro (não só na face) de alguma caixa"""
+        for bx0, by0, bz0, bx1, by1, bz1 in self.near(x, y, z, x, y, z):
+            if bx0 - EPS <= x < bx1 - EPS and by0 - EPS <= y < by1 - EPS and bz0 - EPS <= z < bz1 - EPS:
+                return True
+        return False
+
+    def drop(self, x: float, y: float, z: float) -> float:
+        """Desce o ponto até o topo de caixa (ou o piso) logo abaixo dele"""
+        floor = 0.0
+        for bx0, by0, _, bx1, by1, bz1 in self.near(x, y, 0.0, x, y, z):
+            if bz1 <= z + EPS and bz1 > floor and bx0 - EPS <= x < bx1 - EPS and by0 - EPS <= y < by1 - EPS:
+                floor = bz1
+        return floor
+
+def _cell_size(inventory: BoxInventory, trailer: Trailer) -> float:
+    """Lado médio das caixas, limitado para a grade não ficar grande demais"""
+    sides = [s for r in inventory.rows() if r.count > 0 for s in (r.c, r.l, r.a)]
+    if not sides:
+        return max(trailer.c, trailer.l, trailer.a)
+    return max(sum(sides) / len(sides), max(trailer.c, trailer.l, trailer.a) / 256)
+
+class _RowSearch:
+    """Busca de uma linha de caixas idênticas, retomada a cada caixa"""
+    __slots__ = ('orientations', 'rejected', 'cursor', 'seen', 'boxes')
+
+    def __init__(self, orientations: Tuple[Orientation, ...], seen: int, boxes: int):
+        self.orientations = orientations
+        self.rejected: Set[Tuple[float, float, float, float, float, float]] = set()   # sem apoio
+        self.cursor: Tuple[float, float, float] | None = None   # ponto da última colocação
+        self.seen = seen                                         # pontos criados até a última busca
+        self.boxes = boxes                                       # caixas colocadas até a última busca
+
+class ExtremePointPacker:
+    """Estado de um empacotamento: grade, pontos extremos e limites do trailer.
+
+    Os pontos ficam ordenados por (x, z, y): o trailer é carregado da
+    cabine para a porta, em paredes que sobem antes de avançar.
+
+    As recusas são guardadas, porque com mais caixas no trailer um ponto só
+    fica mais ocupado: por ponto, as medidas barradas por parede ou caixa
+    (qualquer caixa maior ou igual nas três medidas também é barrada ali);
+    por linha, o ponto da última colocação, de onde a próxima caixa igual
+    retoma a busca; e, até a próxima colocação, as orientações que não
+    couberam em lugar nenhum. O apoio, ao contrário, cresce com novas
+    caixas: as recusas por falta de apoio da linha caem quando chega uma
+    caixa com o topo na altura do ponto e sob a base recusada, e uma
+    orientação recusada por apoio em algum ponto não conta como "não
+    coube em lugar nenhum".
+    """
+    def __init__(self, trailer: Trailer, cell: float, min_side: float = 0.0,
+                 min_support: float = MIN_SUPPORT):
+        self.C, self.L, self.A = trailer.c, trailer.l, trailer.a
+        self.min_side = min_side        # menor lado entre todas as caixas a colocar
+        self.min_support = min_support
+        self.grid = SpatialGrid(cell)
+        self.points: List[Tuple[float, float, float]] = [(0.0, 0.0, 0.0)]   # (x, z, y), ordenados
+        self._live: Set[Tuple[float, float, float]] = {(0.0, 0.0, 0.0)}
+        self._known: Set[Tuple[float, float, float]] = {(0.0, 0.0, 0.0)}
+        self._log: List[Tuple[float, float, float]] = [(0.0, 0.0, 0.0)]     # pontos na ordem de criação
+        self._blocked: Dict[Tuple[float, float, float], List[Orientation]] = {}
+        self._failed: List[Orientation] = []
+        self.attempts = 0
+        self.candidates_checked = 0
+        self.peak_points = 1
+
+    def fits(self, x: float, y: float, z: float, w: float, d: float, h: float) -> bool:
+        return self._check(x, y, z, w, d, h) is FIT
+
+    def _check(self, x: float, y: float, z: float, w: float, d: float, h: float) -> int:
+        if x + w > self.C + EPS or y + d > self.L + EPS or z + h > self.A + EPS:
+            return BLOCKED
+        self.candidates_checked += 1
+        if self.grid.collides(x, y, z, x + w, y + d, z + h):
+            return BLOCKED
+        if z <= EPS or self.grid.support(x, y, x + w, y + d, z) >= self.min_support * w * d - EPS:
+            return FIT
+        return UNSUPPORTED
+
+    def search(self, orientations: Tuple[Orientation, ...]) -> _RowSearch:
+        return _RowSearch(orientations, len(self._log), len(self.grid.boxes))
+
+    def _supported_again(self, search: _RowSearch) -> Set[Tuple[float, float, float]]:
+        """Descarta as recusas por apoio que as caixas novas podem ter resolvido; retorna os pontos"""
+        new = self.grid.boxes[search.boxes:]
+        search.boxes = len(self.grid.boxes)
+        again: Set[Tuple[float, float, float]] = set()
+        if not new or not search.rejected:
+            return again
+        for key in list(search.rejected):
+            x, z, y, w, d, _ = key
+            for bx0, by0, _, bx1, by1, bz1 in new:
+                if (abs(bz1 - z) <= EPS and x < bx1 - EPS and bx0 < x + w - EPS
+                        and y < by1 - EPS and by0 < y + d - EPS):
+                    search.rejected.discard(key)
+                    again.add((x, z, y))
+                    break
+        return again
+
+    def find(self, search: _RowSearch):
+        """Primeiro ponto (na ordem dos pontos) onde alguma orientação cabe.
+
+        Retorna ((x, y, z), (w, d, h)) ou None.
+        """
+        self.attempts += 1
+        failed = self._failed
+        if failed and all(any(w >= fw and d >= fd and h >= fh for fw, fd, fh in failed)
+                          for w, d, h in search.orientations):
+            return None
+        again = self._supported_again(search)
+        if search.cursor is None:
+            candidates = self.points
+        else:
+            # Antes do cursor, só são novidade os pontos criados desde a última
+            # busca e os que podem ter ganhado apoio
+            cursor = search.cursor
+            again.update(self._log[search.seen:])
+            fresh = sorted(p for p in again if p < cursor and p in self._live)
+            candidates = fresh + self.points[bisect_left(self.points, cursor):]
+        search.seen = len(self._log)
+
+        rejected, dead, hit = search.rejected, [], None
+        for p in candidates:
+            x, z, y = p
+            blocked = self._blocked.get(p)
+            tested = False
+            for w, d, h in search.orientations:
+                key = (x, z, y, w, d, h)
+                if key in rejected:
+                    continue
+                if blocked is not None and any(w >= bw and d >= bd and h >= bh for bw, bd, bh in blocked):
+                    continue
+                tested = True
+                status = self._check(x, y, z, w, d, h)
+                if status is FIT:
+                    hit = (x, y, z), (w, d, h)
+                    break
+                if status is BLOCKED:
+                    # Só os mínimos importam: descarta os que a nova medida domina
+                    blocked = self._blocked[p] = [o for o in blocked or ()
+                                                  if not (o[0] >= w and o[1] >= d and o[2] >= h)]
+                    blocked.append((w, d, h))
+                else:
+                    rejected.add(key)
+            if hit is not None:
+                search.cursor = p
+                break
+            if tested and self._dead(x, y, z):
+                dead.append(p)
+        if dead:
+            self._drop_points(dead)
+        if hit is None and not rejected:
+            failed.extend(search.orientations)
+        return hit
+
+    def _dead(self, x: float, y: float, z: float) -> bool:
+        """Nenhuma caixa cabe mais no ponto: nem o cubo do menor lado"""
+        m = self.min_side
+        return (x + m > self.C + EPS or y + m > self.L + EPS or z + m > self.A + EPS
+                or self.grid.collides(x, y, z, x + m, y + m, z + m))
+
+    def _drop_points(self, points: List[Tuple[float, float, float]]):
+        gone = set(points)
+        self.points = [p for p in self.points if p not in gone]
+        self._live -= gone
+        for p in gone:
+            self._blocked.pop(p, None)
+
+    def _add_point(self, x: float, y: float, z: float):
+        if x >= self.C - EPS or y >= self.L - EPS or z >= self.A - EPS:
+            return
+        key = (x, z, y)
+        if key in self._known or self.grid.inside(x, y, z) or self._dead(x, y, z):
+            return
+        self._known.add(key)
+        self._live.add(key)
+        self._log.append(key)
+        insort(self.points, key)
+        self.peak_points = max(self.peak_points, len(self.points))
+
+    def commit(self, pos: Tuple[float, float, float], dims: Tuple[float, float, float]):
+        """Registra a caixa e atualiza os pontos extremos"""
+        x, y, z = pos
+        w, d, h = dims
+        self.grid.add((x, y, z, x + w, y + d, z + h))
+        self._failed.clear()
+        # Pontos cobertos pela nova caixa deixam de ser cantos livres
+        self._drop_points([p for p in self.points
+                           if x - EPS <= p[0] < x + w - EPS and y - EPS <= p[2] < y + d - EPS
+                           and z - EPS <= p[1] < z + h - EPS])
+        self._add_point(x, y, z + h)
+        for px, py in ((x + w, y), (x, y + d)):
+            self._add_point(px, py, z)
+            if z > EPS:
+                # Projeção para baixo: o canto também vale apoiado no que houver embaixo
+                self._add_point(px, py, self.grid.drop(px, py, z))
+
+def pack_extreme_points(trailer: Trailer, inventory: BoxInventory, block: bool = False,
+                        sort_key: str = "area", prefer: str | None = None,
+                        diagnostics: Diagnostics = NULL_DIAGNOSTICS,
+                        on_progress: Callable[[int, int], None] | None = None,
+                        min_support: float = MIN_SUPPORT):
+    """Empacotamento 3D por pontos extremos; mesma interface de ``pack_grouped_corrected``.
+
+    Retorna (caixas colocadas, ``BoxInventory`` do que não coube). Os grupos
+    são seguidos na ordem do inventário e as linhas de cada grupo pela
+    ``sort_key``; ``prefer`` ordena as orientações. Quando uma caixa não
+    cabe em ponto algum, o resto da sua linha (caixas idênticas) também não
+    cabe e vai direto para as sobras. ``block`` é aceito por compatibilidade:
+    este motor sempre coloca caixa a caixa. ``on_progress(caixas, 0)`` é
+    chamado a cada grupo concluído (não há camadas a contar; a tela mostra
+    só as caixas).
+    """
+    sides = [s for r in inventory.rows() if r.count > 0 for s in (r.c, r.l, r.a)]
+    packer = ExtremePointPacker(trailer, _cell_size(inventory, trailer), min(sides, default=0.0), min_support)
+    placed: List[Box] = []
+    unplaced = BoxInventory()
+
+    for group in inventory.groups:
+        left_over = []
+        for row in sorted(group, key=SORT_KEYS[sort_key], reverse=True):
+            if row.count <= 0:
+                continue
+            search = packer.search(ordered_orientations(row.orientations(), prefer))
+            for k in range(row.count):
+                hit = packer.find(search)
+                if hit is None:
+                    left_over.append(row.tail(k))
+                    break
+                pos, dims = hit
+                packer.commit(pos, dims)
+                b = row.box(k)
+                b.c, b.l, b.a = dims
+                b.pos = pos
+                placed.append(b)
+        if left_over:
+            unplaced.groups.append(left_over)
+        if on_progress is not None:
+            on_progress(len(placed), 0)
+
+    diagnostics.count("placement_attempts", packer.attempts)
+    diagnostics.count("ep_candidates_checked", packer.candidates_checked)
+    diagnostics.peak("extreme_points", packer.peak_points)
+    diagnostics.peak("grid_cells", len(packer.grid.cells))
+    return placed, unplaced
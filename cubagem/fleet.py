@@ -0,0 +1,105 @@
+"""Modo frota: divide uma carga entre vários veículos.
+
+A cada rodada o que sobrou da carga é empacotado, em paralelo, em cada
+tipo de veículo ainda disponível. Fica o veículo que levar mais volume
+(no empate, o menor), e as sobras dele seguem para a rodada seguinte.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+from .bounds import fleet_bound
+from .diagnostics import NULL_DIAGNOSTICS, Diagnostics
+from .engine import Box, BoxInventory, Trailer, analyze_packing_efficiency, pack_grouped_corrected
+
+def _pack_candidate(dims: Tuple[float, float, float], inventory: BoxInventory, block: bool,
+                    packer: Callable = pack_grouped_corrected):
+    return packer(Trailer(*dims), inventory, block=block)
+
+class FleetVehicle:
+    def __init__(self, index: int, trailer: Trailer, placed: List[Box], analysis: Dict):
+        self.index = index          # posição do veículo na lista recebida
+        self.trailer = trailer
+        self.placed = placed
+        self.analysis = analysis
+
+class FleetResult:
+    def __init__(self, vehicles: List[FleetVehicle], unplaced: BoxInventory, min_vehicles: int = 0):
+        self.vehicles = vehicles
+        self.unplaced = unplaced
+        self.min_vehicles = min_vehicles    # limite inferior de veículos (``cubagem.bounds``)
+
+    @property
+    def vehicles_used(self) -> int:
+        return len(self.vehicles)
+
+    def summary(self) -> List[Dict]:
+        return [
+            {
+                "Veículo": n,
+                "Dimensões (CxLxA)": f"{v.trailer.c:.2f}x{v.trailer.l:.2f}x{v.trailer.a:.2f}",
+                "Caixas": v.analysis.get("total_boxes", 0),
+                "Ocupação (%)": round(v.analysis.get("volume_efficiency", 0.0), 1),
+                "Altura Utilizada (%)": round(v.analysis.get("height_usage", 0.0), 1),
+            }
+            for n, v in enumerate(self.vehicles, 1)
+        ]
+
+def pack_fleet(trailers: List[Trailer], inventory: BoxInventory, block: bool = True,
+               workers: int | None = None, diagnostics: Diagnostics = NULL_DIAGNOSTICS,
+               packer: Callable = pack_grouped_corrected,
+               on_progress: Callable[[int, int], None] | None = None) -> FleetResult:
+    """Distribui o inventário pelos veículos de ``trailers`` (cada item é um veículo).
+
+    Veículos de mesmas dimensões são avaliados uma só vez por rodada. Para
+    quando tudo foi colocado, quando acabam os veículos ou quando nenhum
+    veículo restante consegue levar caixa alguma. ``packer`` é o motor
+    usado em cada veículo (mesma interface de ``pack_grouped_corrected``).
+    ``on_progress(veículos usados, caixas restantes)`` é chamado a cada rodada.
+    """
+    min_vehicles = fleet_bound(inventory, trailers)
+    available = list(range(len(trailers)))
+    vehicles: List[FleetVehicle] = []
+    remaining = inventory
+    pool = None
+    try:
+        while len(remaining) and available:
+            # Um candidato por tamanho distinto de veículo
+            candidates: Dict[Tuple[float, float, float], int] = {}
+            for i in available:
+                t = trailers[i]
+                candidates.setdefault((t.c, t.l, t.a), i)
+            dims = list(candidates)
+            diagnostics.count("fleet_rounds")
+            diagnostics.count("fleet_candidates_packed", len(dims))
+            if len(dims) == 1:
+                results = [_pack_candidate(dims[0], remaining, block, packer)]
+            else:
+                if pool is None:
+                    pool = ProcessPoolExecutor(
+                        max_workers=min(workers or os.cpu_count() or 1, len(dims)),
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                futures = [pool.submit(_pack_candidate, d, remaining, block, packer) for d in dims]
+                results = [f.result() for f in futures]
+
+            best = max(
+                range(len(dims)),
+                key=lambda k: (sum(b.volume for b in results[k][0]), -Trailer(*dims[k]).volume),
+            )
+            placed, unplaced = results[best]
+            if not placed:
+                break
+            idx = candidates[dims[best]]
+            trailer = trailers[idx]
+            vehicles.append(FleetVehicle(idx, trailer, placed,
+                                         analyze_packing_efficiency(placed, trailer, unplaced)))
+            available.remove(idx)
+            remaining = unplaced
+            if on_progress is not None:
+                on_progress(len(vehicles), len(remaining))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return FleetResult(vehicles, remaining, min_vehicles)
@@ -0,0 +1,172 @@
+"""Plano incremental: acrescenta ou retira pedidos sem refazer a carga toda.
+
+O plano guarda o estado do empacotamento em camadas (skyline e caixas de
+cada camada). Acrescentar grupos continua de onde a passada parou e depois
+tenta os vãos das camadas anteriores; retirar SKUs refaz só as camadas que
+tinham caixas deles e desce as camadas de cima, sem reempacotá-las.
+
+Tolerância em relação a refazer tudo com ``pack_grouped_corrected``:
+
+- ``add`` coloca tudo o que a passada completa (com os grupos novos no fim)
+  colocaria, nas mesmas posições, e às vezes mais, pelos vãos;
+- ``remove`` não perde caixas nem as sobrepõe, mas não garante o volume de
+  uma passada completa sobre o que restou: sem ``refill`` as sobras do
+  plano não ocupam o espaço liberado, então o volume pode ficar bem abaixo;
+  com ``refill=True`` fica perto dele, acima ou abaixo.
+
+``python -m benchmarks.check_reference`` confere ``add`` e a integridade
+depois de ``remove`` e mostra a diferença de volume nas cargas sintéticas.
+"""
+from typing import Iterable, List
+
+from .engine import (Box, BoxInventory, Layer, LayerPacker, SkuRow, SkylineLayer, Trailer,
+                     analyze_packing_efficiency)
+
+def _rows_from_boxes(boxes: List[Box]) -> List[SkuRow]:
+    """Linhas de inventário para caixas já materializadas (índices consecutivos juntos)"""
+    rows: List[SkuRow] = []
+    for b in boxes:
+        last = rows[-1] if rows else None
+        if (last is not None and last.sku == b.sku and last.first + last.count == b.index
+                and (last.c, last.l, last.a, last.rotation_axes)
+                == (b.original_c, b.original_l, b.original_a, b.rotation_axes)):
+            last.count += 1
+        else:
+            rows.append(SkuRow(b.sku, b.original_c, b.original_l, b.original_a, 1,
+                               b.index if b.index is not None else 1, b.rotation_axes))
+    return rows
+
+class IncrementalPlan:
+    """Plano de carga em camadas que aceita alterações.
+
+    ``placed`` e ``unplaced`` têm o mesmo formato da saída de
+    ``pack_grouped_corrected``, então a análise e a visualização não mudam.
+    """
+    def __init__(self, trailer: Trailer, inventory: BoxInventory | None = None, block: bool = True,
+                 sort_key: str = "area", prefer: str | None = None, merge: bool = False):
+        self.trailer = trailer
+        self._packer = LayerPacker(trailer, block, sort_key, prefer, merge=merge)
+        self.unplaced = BoxInventory()
+        if inventory is not None:
+            self.add(inventory)
+
+    @property
+    def placed(self) -> List[Box]:
+        return self._packer.placed
+
+    @property
+    def layers(self):
+        return self._packer.layers
+
+    def analysis(self):
+        return analyze_packing_efficiency(self.placed, self.trailer, self.unplaced)
+
+    def add(self, inventory: BoxInventory) -> List[Box]:
+        """Acrescenta grupos ao plano; retorna as caixas colocadas agora"""
+        layers = self._packer.layers
+        before = [len(layer.boxes) for layer in layers]
+        left_over = self._packer.pack(inventory.groups)
+        for group in left_over.groups:
+            rest = self._fill_gaps(group)
+            if rest:
+                self.unplaced.groups.append(rest)
+        return [b for i, layer in enumerate(layers)
+                for b in layer.boxes[before[i] if i < len(before) else 0:]]
+
+    def _fill_gaps(self, group: List[SkuRow]) -> List[SkuRow]:
+        """Tenta as linhas do grupo nos vãos das camadas já fechadas.
+
+        Uma caixa só entra numa camada se não passar da altura dela (nem da
+        do trailer), para não invadir a camada de cima. A camada atual fica
+        de fora enquanto o plano puder crescer, para que os próximos ``add``
+        continuem exatamente como uma passada completa.
+        """
+        packer, top = self._packer, self.trailer.a
+        layers = packer.layers if packer.closed else packer.layers[:-1]
+        rest: List[SkuRow] = []
+        for row in group:
+            k = 0
+            for layer in layers:
+                if k >= row.count:
+                    break
+                max_h = min(layer.height, top - layer.z)
+                if max_h <= 0.0:
+                    continue
+                while k < row.count:
+                    n = packer.put(layer, row, k, row.box(k), max_h)
+                    if not n:
+                        break
+                    k += n
+            if k < row.count:
+                rest.append(row.tail(k))
+        return rest
+
+    def remove(self, skus: Iterable[str], refill: bool = False) -> List[Box]:
+        """Retira do plano as caixas dos SKUs dados; retorna as caixas retiradas.
+
+        Só as camadas que tinham essas caixas são refeitas, na ordem em que
+        as caixas restantes foram colocadas e sem passar da altura antiga;
+        as camadas de cima descem se alguma ficar mais baixa. O que não
+        voltar a caber e, com ``refill``, as sobras do plano são oferecidos
+        de novo ao espaço livre (custo proporcional às sobras).
+        """
+        skus = set(skus)
+        packer = self._packer
+        removed: List[Box] = []
+        displaced: List[Box] = []
+        for layer in packer.layers:
+            if not any(b.sku in skus for b in layer.boxes):
+                continue
+            keep = []
+            for b in layer.boxes:
+                (removed if b.sku in skus else keep).append(b)
+            for b in removed:
+                b.pos = None
+            displaced += self._rebuild(layer, keep)
+        self.unplaced = BoxInventory([
+            rows for rows in ([r for r in g if r.sku not in skus] for g in self.unplaced.groups) if rows
+        ])
+        self._restack()
+        packer.closed = False
+
+        retry = [_rows_from_boxes(displaced)] if displaced else []
+        if refill:
+            retry += self.unplaced.groups
+            self.unplaced = BoxInventory()
+        if retry:
+            self.add(BoxInventory(retry))
+        return removed
+
+    def _rebuild(self, layer: Layer, boxes: List[Box]) -> List[Box]:
+        """Refaz a skyline da camada só com ``boxes``; retorna as que não couberam"""
+        old_height = layer.height
+        layer.sky = SkylineLayer(self.trailer.c, self.trailer.l, merge=self._packer.merge,
+                                 prefer=self._packer.prefer)
+        layer.boxes, layer.height = [], 0.0
+        displaced = []
+        for b in boxes:
+            b.c, b.l, b.a = b.original_c, b.original_l, b.original_a
+            ok, pos = layer.sky.place(b, old_height)
+            if ok:
+                b.pos = (*pos, layer.z)
+                layer.boxes.append(b)
+                layer.height = max(layer.height, b.a)
+            else:
+                b.pos = None
+                displaced.append(b)
+        return displaced
+
+    def _restack(self):
+        """Descarta camadas vazias e recalcula a base de cada camada"""
+        packer = self._packer
+        layers = [layer for layer in packer.layers if layer.boxes]
+        z = 0.0
+        for layer in layers:
+            if layer.z != z:
+                layer.z = z
+                for b in layer.boxes:
+                    b.pos = (b.pos[0], b.pos[1], z)
+            z += layer.height
+        packer.layers = layers
+        if not layers:
+            packer.open_layer(0.0)
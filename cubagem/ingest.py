@@ -0,0 +1,267 @@
+"""Leitura das planilhas de carregamento e de medidas.
+
+pandas e openpyxl são importados só dentro das funções que os usam.
+"""
+from __future__ import annotations
+
+import csv
+import hashlib
+import io
+import math
+import os
+import threading
+from collections import OrderedDict
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Tuple, Dict
+
+from .engine import BoxInventory, SkuRow
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# =================== CARREGAMENTO DE PLANILHAS ===================
+CACHE_DIR = Path(os.environ.get("CUBAGEM_CACHE_DIR", Path.home() / ".cache" / "cubagem"))
+CACHE_MAX_FILES = 64        # planilhas normalizadas mantidas em disco
+CACHE_VERSION = 1           # mude ao alterar a normalização: os arquivos antigos deixam de valer
+MEASURES_CACHE_SIZE = 8     # tabelas de medidas mantidas em memória
+_measures_cache: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+_measures_lock = threading.Lock()
+
+def _file_bytes(src) -> bytes:
+    """Conteúdo de um upload do Streamlit, arquivo aberto ou caminho"""
+    if hasattr(src, "getvalue"):
+        return src.getvalue()
+    if hasattr(src, "read"):
+        data = src.read()
+        if hasattr(src, "seek"):
+            src.seek(0)
+        return data
+    return Path(src).read_bytes()
+
+def _key_part(s: pd.Series) -> pd.Series:
+    """Equivalente vetorizado de ``str(valor)`` célula a célula"""
+    return s.astype(str).fillna("nan")
+
+def _evict_disk_cache():
+    files = sorted(CACHE_DIR.glob("*.parquet"), key=lambda p: p.stat().st_mtime)
+    for old in files[:max(0, len(files) - CACHE_MAX_FILES)]:
+        old.unlink(missing_ok=True)
+
+def _cached_frame(kind: str, digest: str, build) -> pd.DataFrame:
+    """Lê a planilha normalizada do cache em disco (Parquet) ou a constrói.
+
+    O cache é um atalho: se o Parquet não estiver disponível ou o arquivo
+    estiver corrompido, a planilha é simplesmente lida de novo do Excel.
+    O nome do arquivo leva ``CACHE_VERSION``, então frames gravados por uma
+    normalização anterior não são reaproveitados (e saem pelo limite de
+    ``CACHE_MAX_FILES``).
+    """
+    import pandas as pd
+
+    path = CACHE_DIR / f"{kind}-v{CACHE_VERSION}-{digest}.parquet"
+    try:
+        df = pd.read_parquet(path)
+        os.utime(path)
+        return df
+    except (ImportError, OSError, ValueError):
+        pass
+
+    df = build()
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        _evict_disk_cache()
+    except Exception:
+        # Colunas com tipos mistos não vão para Parquet; segue sem cache
+        tmp.unlink(missing_ok=True)
+    return df
+
+def _read_measures(data: bytes) -> pd.DataFrame:
+    """Tabela de medidas normalizada (KEY + dimensões), em cache por conteúdo"""
+    digest = hashlib.sha256(data).hexdigest()
+    with _measures_lock:
+        if digest in _measures_cache:
+            _measures_cache.move_to_end(digest)
+            return _measures_cache[digest]
+
+    def build():
+        import pandas as pd
+
+        med = pd.read_excel(io.BytesIO(data), engine="openpyxl")
+        med["KEY"] = (_key_part(med["COD FAMILIA"]) + "-" + _key_part(med["COD TAMANHO"])
+                      + "-" + med["QMM"].astype(int).astype(str))
+        return med[["KEY", "ALTURA", "LARGURA", "COMPRIMENTO"]]
+
+    med = _cached_frame("med", digest, build)
+    with _measures_lock:
+        _measures_cache[digest] = med
+        while len(_measures_cache) > MEASURES_CACHE_SIZE:
+            _measures_cache.popitem(last=False)
+    return med
+
+def _read_loading(data: bytes) -> pd.DataFrame:
+    import pandas as pd
+
+    digest = hashlib.sha256(data).hexdigest()
+    return _cached_frame("car", digest, lambda: pd.read_excel(io.BytesIO(data), engine="openpyxl"))
+
+def load_files(car_path, med_path):
+    """Carrega e cruza as planilhas de carregamento e de medidas.
+
+    As chaves são montadas com operações vetorizadas de string; as planilhas
+    já vistas (mesmo conteúdo) não são lidas do Excel de novo.
+    """
+    car = _read_loading(_file_bytes(car_path)).copy()
+    med = _read_measures(_file_bytes(med_path))
+
+    parts = _key_part(car["COD SKU"]).str.split("-")
+    car["KEY"] = parts.str[0] + "-" + parts.str[2] + "-" + _key_part(car["QMM"])
+
+    merged = car.merge(
+        med,
+        on="KEY",
+        how="left",
+    )
+    missing = merged[merged["ALTURA"].isna()]
+    merged = merged.dropna(subset=["ALTURA"])
+    return merged, missing
+
+# =================== LEITURA EM FLUXO ===================
+STREAM_CHUNK_ROWS = 5000
+# Colunas de CSV convertidas em número; as demais (chaves) ficam como texto
+CSV_NUMBER_COLUMNS = frozenset({"QTDE", "QMM", "COMPRIMENTO", "LARGURA", "ALTURA"})
+
+def is_csv_source(src) -> bool:
+    """Fonte CSV (pelo nome do arquivo ou do upload)"""
+    name = getattr(src, "name", src)
+    return isinstance(name, (str, os.PathLike)) and str(name).lower().endswith(".csv")
+
+def _csv_number(v: str):
+    """Converte texto de CSV em número (aceita vírgula decimal)"""
+    v = v.strip()
+    if not v:
+        return None
+    try:
+        return int(v)
+    except ValueError:
+        pass
+    try:
+        return float(v.replace(".", "").replace(",", ".") if "," in v else v)
+    except ValueError:
+        return v
+
+def _csv_text(v: str):
+    v = v.strip()
+    return v or None
+
+def _iter_chunks(src, chunk_rows: int = STREAM_CHUNK_ROWS):
+    """Gera (cabeçalho, lote de linhas) sem carregar a planilha inteira.
+
+    No CSV só as colunas de ``CSV_NUMBER_COLUMNS`` viram número; códigos
+    como COD FAMILIA e COD TAMANHO mantêm os zeros à esquerda.
+    """
+    if is_csv_source(src):
+        if hasattr(src, "getvalue"):
+            text = io.StringIO(src.getvalue().decode("utf-8-sig"))
+        elif hasattr(src, "read"):
+            text = io.TextIOWrapper(src, encoding="utf-8-sig")
+        else:
+            text = open(src, newline="", encoding="utf-8-sig")
+        with text:
+            dialect = csv.Sniffer().sniff(text.readline(), delimiters=",;\t")
+            text.seek(0)
+            reader = csv.reader(text, dialect)
+            header = [h.strip() for h in next(reader)]
+            convert = [_csv_number if h in CSV_NUMBER_COLUMNS else _csv_text for h in header]
+            rows = (tuple(f(v) for f, v in zip(convert, r)) for r in reader if r)
+            while chunk := list(islice(rows, chunk_rows)):
+                yield header, chunk
+        return
+
+    import openpyxl
+    fh = io.BytesIO(src.getvalue()) if hasattr(src, "getvalue") else src
+    wb = openpyxl.load_workbook(fh, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else "" for h in next(rows)]
+        while chunk := list(islice(rows, chunk_rows)):
+            yield header, chunk
+    finally:
+        wb.close()
+
+def _cell_str(v) -> str:
+    return "nan" if v is None else str(v)
+
+def read_measures_index(med_src) -> Dict[str, List[Tuple[float, float, float]]]:
+    """Índice KEY -> [(comprimento, largura, altura)] da planilha de medidas"""
+    index: Dict[str, List[Tuple[float, float, float]]] = {}
+    for header, chunk in _iter_chunks(med_src):
+        col = {h: i for i, h in enumerate(header)}
+        fam, tam, qmm = col["COD FAMILIA"], col["COD TAMANHO"], col["QMM"]
+        dims = col["COMPRIMENTO"], col["LARGURA"], col["ALTURA"]
+        for r in chunk:
+            if r[dims[2]] is None:
+                continue
+            key = f"{_cell_str(r[fam])}-{_cell_str(r[tam])}-{int(r[qmm])}"
+            index.setdefault(key, []).append(tuple(float(r[i]) for i in dims))
+    return index
+
+def stream_inventory(car_src, med_src, rotation_axes: List[str],
+                     chunk_rows: int = STREAM_CHUNK_ROWS) -> Tuple[BoxInventory, List[str]]:
+    """Versão em fluxo de ``load_files`` + ``expand_grouped_with_rotation``.
+
+    Lê a planilha de carregamento (xlsx ou csv) em lotes de ``chunk_rows``
+    linhas, cruza cada lote com o índice de medidas e acumula direto no
+    inventário. Linhas com o mesmo SKU e dimensões são somadas, então a
+    memória depende do número de tipos de caixa e não do tamanho do arquivo.
+    ``med_src`` pode ser um índice já pronto de ``read_measures_index``,
+    para reaproveitar as medidas em vários carregamentos.
+    Retorna o inventário e os SKUs sem medidas.
+    """
+    measures = med_src if isinstance(med_src, dict) else read_measures_index(med_src)
+    groups: Dict[str, Dict[Tuple[float, float, float], SkuRow]] = {}
+    missing: Dict[str, None] = {}
+
+    for header, chunk in _iter_chunks(car_src, chunk_rows):
+        col = {h: i for i, h in enumerate(header)}
+        i_sku, i_qtde, i_qmm = col["COD SKU"], col["QTDE"], col["QMM"]
+        for r in chunk:
+            sku, qtde, qmm = r[i_sku], r[i_qtde], r[i_qmm]
+            parts = _cell_str(sku).split("-")
+            key = f"{parts[0]}-{parts[2]}-{_cell_str(qmm)}" if len(parts) > 2 else None
+            matches = measures.get(key)
+            if not matches:
+                missing[sku] = None
+                continue
+            rows = groups.setdefault(sku, {})
+            if not qmm or (isinstance(qmm, float) and math.isnan(qmm)):
+                continue
+            n = math.ceil(qtde / qmm)
+            for c, l, a in matches:
+                if n <= 0:
+                    continue
+                if (c, l, a) in rows:
+                    rows[(c, l, a)].count += n
+                else:
+                    rows[(c, l, a)] = SkuRow(sku, c, l, a, n, 1, rotation_axes)
+
+    inventory = BoxInventory([list(rows.values()) for rows in groups.values()])
+    return inventory, list(missing)
+
+def expand_grouped_with_rotation(df: pd.DataFrame, rotation_axes: List[str]) -> BoxInventory:
+    """Agrupa as linhas por SKU em um inventário (uma linha por tipo de caixa)"""
+    groups: Dict[str, List[SkuRow]] = {}
+    
+    for sku, qtde, qmm, c, l, a in zip(df["COD SKU"], df["QTDE"], df["QMM"],
+                                       df["COMPRIMENTO"], df["LARGURA"], df["ALTURA"]):
+        if sku not in groups:
+            groups[sku] = []
+        if qmm == 0 or math.isnan(qmm):
+            continue
+        n = math.ceil(qtde / qmm)
+        if n > 0:
+            groups[sku].append(SkuRow(sku, c, l, a, n, 1, rotation_axes))
+    return BoxInventory(list(groups.values()))
@@ -0,0 +1,154 @@
+"""Fila de trabalhos: simulações longas num pool de processos local.
+
+Cada trabalho roda num processo do pool, então várias simulações ao mesmo
+tempo usam vários núcleos em vez de disputar o processo do Streamlit.
+Trabalhos que abrem o próprio pool (otimizador, frota, cenários) são
+enviados com ``submit(..., pooled=True)`` e recebem ``workers=`` com os
+núcleos livres quando começam: cada trabalho em execução ocupa um núcleo,
+ou os que recebeu, e os que sobram vão para o próximo (no mínimo um). Um
+trabalho sozinho usa a máquina toda, e a fila cheia não passa muito do
+número de núcleos. O
+andamento e os pedidos de cancelamento passam por dicionários de um
+``multiprocessing.Manager``; o resultado é buscado pelo id do trabalho.
+
+A função enviada recebe ``progress=`` e deve chamá-lo com o andamento
+(como ``cubagem.simulation.run_simulation``); é nessas chamadas que o
+cancelamento é verificado, então um trabalho em execução para na próxima
+atualização de andamento.
+"""
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from typing import Callable, Dict
+
+PROGRESS_INTERVAL = 0.2     # segundos entre atualizações de andamento enviadas
+
+PENDING, RUNNING, DONE, CANCELLED, FAILED = "pendente", "executando", "concluído", "cancelado", "erro"
+
+class JobCancelled(Exception):
+    """O trabalho foi cancelado antes de terminar"""
+
+class _Reporter:
+    """``progress`` dentro do processo do trabalho: publica o andamento e verifica o cancelamento"""
+    def __init__(self, job_id: str, progress, cancel):
+        self.job_id = job_id
+        self._progress, self._cancel = progress, cancel
+        self._fields: Dict = {}
+        self._last = 0.0
+
+    def __call__(self, **fields):
+        stage_changed = fields.get("stage", self._fields.get("stage")) != self._fields.get("stage")
+        self._fields.update(fields)
+        now = time.monotonic()
+        if not stage_changed and now - self._last < PROGRESS_INTERVAL:
+            return
+        self._last = now
+        self._progress[self.job_id] = dict(self._fields)
+        if self._cancel.get(self.job_id):
+            raise JobCancelled(self.job_id)
+
+def _claim_cores(job_id: str, cores, lock, pooled: bool) -> int:
+    """Reserva os núcleos do trabalho: todos os livres se ``pooled``, senão um"""
+    with lock:
+        idle = (os.cpu_count() or 1) - sum(cores.values())
+        cores[job_id] = n = max(1, idle) if pooled else 1
+    return n
+
+def _run_job(job_id: str, fn: Callable, args, kwargs, progress, cancel, cores, lock, pooled: bool):
+    n = _claim_cores(job_id, cores, lock, pooled)
+    try:
+        reporter = _Reporter(job_id, progress, cancel)
+        reporter(stage="start")
+        if pooled:
+            kwargs = {**kwargs, "workers": n}
+        return fn(*args, progress=reporter, **kwargs)
+    finally:
+        cores.pop(job_id, None)
+
+class JobQueue:
+    """Pool de processos com andamento, cancelamento e resultados por id.
+
+    É seguro compartilhar uma fila entre sessões (``st.cache_resource``):
+    as operações só mexem no dicionário de trabalhos sob um lock.
+    """
+    def __init__(self, workers: int | None = None):
+        ctx = multiprocessing.get_context("spawn")
+        self.workers = workers or os.cpu_count() or 1
+        self._manager = ctx.Manager()
+        self._progress = self._manager.dict()   # id -> último andamento publicado
+        self._cancel = self._manager.dict()     # id -> True quando cancelado
+        self._cores = self._manager.dict()      # id -> núcleos reservados pelo trabalho em execução
+        self._cores_lock = self._manager.Lock()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx)
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args, pooled: bool = False, **kwargs) -> str:
+        """Enfileira ``fn(*args, progress=..., **kwargs)``; retorna o id do trabalho.
+
+        Com ``pooled=True`` a função também recebe ``workers=``, o número de
+        núcleos livres quando o trabalho começa.
+        """
+        job_id = uuid.uuid4().hex[:12]
+        future = self._pool.submit(_run_job, job_id, fn, args, kwargs, self._progress, self._cancel,
+                                   self._cores, self._cores_lock, pooled)
+        with self._lock:
+            self._futures[job_id] = future
+        return job_id
+
+    def _future(self, job_id: str) -> Future:
+        with self._lock:
+            return self._futures[job_id]
+
+    def status(self, job_id: str) -> str:
+        future = self._future(job_id)
+        if future.cancelled():
+            return CANCELLED
+        if future.done():
+            exc = future.exception()
+            if exc is None:
+                return DONE
+            return CANCELLED if isinstance(exc, JobCancelled) else FAILED
+        # O pool marca como "running" o que já foi para a fila interna dele
+        return RUNNING if job_id in self._progress else PENDING
+
+    def progress(self, job_id: str) -> Dict:
+        """Último andamento publicado pelo trabalho (vazio se ainda não começou)"""
+        return dict(self._progress.get(job_id, {}))
+
+    def cancel(self, job_id: str):
+        """Tira o trabalho da fila ou pede que ele pare na próxima atualização"""
+        if not self._future(job_id).cancel():
+            self._cancel[job_id] = True
+
+    def result(self, job_id: str, timeout: float | None = None):
+        """Resultado do trabalho; ``JobCancelled`` se ele foi cancelado"""
+        try:
+            return self._future(job_id).result(timeout)
+        except CancelledError:
+            raise JobCancelled(job_id) from None
+
+    def forget(self, job_id: str):
+        """Descarta o trabalho (e o resultado) da fila; se ainda não terminou, cancela antes"""
+        with self._lock:
+            future = self._futures.pop(job_id, None)
+        if future is None or future.done():
+            self._discard(job_id)
+            return
+        if not future.cancel():
+            self._cancel[job_id] = True
+        # O pedido de cancelamento fica até o processo do trabalho parar
+        future.add_done_callback(lambda _: self._discard(job_id))
+
+    def _discard(self, job_id: str):
+        self._progress.pop(job_id, None)
+        self._cancel.pop(job_id, None)
+
+    def shutdown(self):
+        for job_id in list(self._futures):
+            self.cancel(job_id)
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._manager.shutdown()
@@ -0,0 +1,184 @@
+"""Otimizador multi-start em volta de ``pack_grouped_corrected`` (ou outro motor).
+
+Cada passada é o mesmo algoritmo guloso com uma perturbação: ordem dos
+grupos, critério de ordenação dentro do grupo e preferência de orientação.
+As passadas rodam em um pool de processos até o prazo e fica a melhor. A
+busca para antes do prazo quando um plano alcança os limites de
+``cubagem.bounds`` (nenhum outro plano seria melhor).
+"""
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, Tuple
+
+from .bounds import PackingBounds, packing_bounds
+from .diagnostics import NULL_DIAGNOSTICS, Diagnostics
+from .engine import (ORIENTATION_PREFS, SORT_KEYS, Box, BoxInventory, Trailer,
+                     pack_grouped_corrected)
+from .patterns import PatternCache
+
+SLICE_SECONDS = 0.5     # duração de cada tarefa enviada ao pool
+
+def reorder(inventory: BoxInventory, order: List[int]) -> BoxInventory:
+    """Inventário com os grupos na ordem dada (sem copiar as linhas)"""
+    return BoxInventory([inventory.groups[i] for i in order])
+
+def plan_score(placed: List[Box]) -> Tuple[float, float]:
+    """Maior volume colocado; no empate, menor altura usada"""
+    if not placed:
+        return (0.0, 0.0)
+    return (sum(b.volume for b in placed), -max(b.pos[2] + b.a for b in placed))
+
+def score_reaches(bounds: PackingBounds, score: Tuple[float, float]) -> bool:
+    return bounds.reached(score[0], -score[1])
+
+def baseline_params(inventory: BoxInventory) -> Dict:
+    return {"order": list(range(len(inventory.groups))), "sort_key": "area", "prefer": None}
+
+def _perturb(rnd: random.Random, base: Dict) -> Dict:
+    """Recomeço aleatório ou pequena variação do melhor plano conhecido"""
+    order = list(base["order"])
+    if rnd.random() < 0.5 or len(order) < 2:
+        rnd.shuffle(order)
+    else:
+        for _ in range(rnd.randint(1, 3)):
+            i, j = rnd.randrange(len(order)), rnd.randrange(len(order))
+            order[i], order[j] = order[j], order[i]
+    return {
+        "order": order,
+        "sort_key": rnd.choice(list(SORT_KEYS)),
+        "prefer": rnd.choice([None, *ORIENTATION_PREFS]),
+    }
+
+# Estado de cada processo do pool (enviado uma vez, no initializer)
+_worker_state: Dict = {}
+
+def _init_worker(trailer_dims, inventory: BoxInventory, block: bool, packer: Callable,
+                 bounds: PackingBounds):
+    _worker_state.update(trailer=Trailer(*trailer_dims), inventory=inventory, block=block, packer=packer,
+                         bounds=bounds)
+
+def _run_slice(seed: int, deadline: float, base: Dict, pass_seconds: float):
+    """Passadas perturbadas por ``SLICE_SECONDS`` ou até um plano alcançar os limites.
+
+    Só começa uma passada que termina antes de ``deadline`` e, depois da
+    primeira, antes do fim da fatia; a duração é estimada pela última
+    passada (``pass_seconds`` na primeira). Sem nenhuma passada, o placar
+    volta ``None``.
+    """
+    trailer, inventory, block, packer, bounds = (
+        _worker_state[k] for k in ("trailer", "inventory", "block", "packer", "bounds"))
+    rnd = random.Random(seed)
+    slice_end = min(time.time() + SLICE_SECONDS, deadline)
+    best_score, best_params, passes = None, None, 0
+    end = deadline
+    while time.time() + pass_seconds < end:
+        params = _perturb(rnd, base)
+        started = time.time()
+        placed, _ = packer(trailer, reorder(inventory, params["order"]), block=block,
+                           sort_key=params["sort_key"], prefer=params["prefer"])
+        pass_seconds = time.time() - started
+        passes += 1
+        score = plan_score(placed)
+        if best_score is None or score > best_score:
+            best_score, best_params = score, params
+        if score_reaches(bounds, best_score):
+            break
+        end = slice_end
+    return best_score, best_params, passes
+
+class OptimizationResult:
+    def __init__(self, placed: List[Box], unplaced: BoxInventory, params: Dict,
+                 history: List[Tuple[float, float]], passes: int, bounds: PackingBounds,
+                 optimal: bool = False):
+        self.placed, self.unplaced = placed, unplaced
+        self.params = params
+        self.history = history      # (segundos, volume colocado) a cada melhora
+        self.passes = passes
+        self.bounds = bounds
+        self.optimal = optimal      # o plano alcançou os limites (a busca parou nele)
+
+def optimize_packing(trailer: Trailer, inventory: BoxInventory, time_budget: float = 10.0,
+                     workers: int | None = None, block: bool = True, seed: int = 0,
+                     on_progress: Callable[[float, float, int], None] | None = None,
+                     diagnostics: Diagnostics = NULL_DIAGNOSTICS,
+                     packer: Callable = pack_grouped_corrected,
+                     patterns: PatternCache | None = None) -> OptimizationResult:
+    """Busca multi-start com prazo de ``time_budget`` segundos.
+
+    A primeira passada é a gulosa padrão, então o resultado nunca é pior
+    que uma passada de ``packer``, que deve aceitar os mesmos argumentos de
+    ``pack_grouped_corrected`` (e ser uma função de módulo, para ir aos
+    processos do pool). Se nenhuma tentativa a supera, o plano guloso é
+    devolvido como está. Senão, o melhor plano é refeito no fim: a busca
+    reserva para isso o tempo da passada gulosa e só começa tarefas e
+    passadas que terminam antes da reserva.
+    ``on_progress(segundos, melhor_volume, passadas)`` é chamado a cada
+    tarefa concluída. ``patterns`` entra só na passada que vira o
+    resultado e grava as camadas dela para as passadas seguintes
+    aproveitarem. Quando um plano alcança os limites, nenhuma tarefa nova
+    é enviada; a tarefa que o achou para ali e as outras terminam no fim
+    da sua fatia.
+    """
+    start = time.time()
+    deadline = start + time_budget
+    bounds = packing_bounds(inventory, trailer)
+    best_params = baseline_params(inventory)
+    extra = {"patterns": patterns} if patterns is not None else {}
+    # Medidas da passada gulosa: só entram em ``diagnostics`` se ela for o resultado
+    greedy_diagnostics = Diagnostics() if diagnostics.enabled else NULL_DIAGNOSTICS
+    greedy_start = time.time()
+    placed, unplaced = packer(trailer, inventory, block=block, diagnostics=greedy_diagnostics, **extra)
+    pass_seconds = time.time() - greedy_start
+    best_score = plan_score(placed)
+    history = [(time.time() - start, best_score[0])]
+    passes = 1
+    optimal = score_reaches(bounds, best_score)
+
+    workers = workers or os.cpu_count() or 1
+    search_end = deadline - pass_seconds      # reserva para refazer o melhor plano
+    if len(inventory.groups) and not optimal and time.time() + pass_seconds < search_end:
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=((trailer.c, trailer.l, trailer.a), inventory, block, packer, bounds),
+        )
+        with pool:
+            task_seed = seed * 1_000_003
+            pending = set()
+
+            def submit():
+                nonlocal task_seed
+                task_seed += 1
+                pending.add(pool.submit(_run_slice, task_seed, search_end, best_params, pass_seconds))
+
+            for _ in range(workers):
+                submit()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for f in done:
+                    score, params, n = f.result()
+                    passes += n
+                    if score is not None and score > best_score:
+                        best_score, best_params = score, params
+                        history.append((time.time() - start, best_score[0]))
+                        optimal = score_reaches(bounds, best_score)
+                    if on_progress:
+                        on_progress(time.time() - start, best_score[0], passes)
+                    if time.time() + pass_seconds < search_end and not optimal:
+                        submit()
+
+    diagnostics.count("optimizer_passes", passes)
+    diagnostics.count("optimizer_improvements", len(history) - 1)
+    if optimal:
+        diagnostics.count("optimizer_stopped_at_bound")
+    if len(history) > 1:
+        placed, unplaced = packer(trailer, reorder(inventory, best_params["order"]), block=block,
+                                  sort_key=best_params["sort_key"], prefer=best_params["prefer"],
+                                  diagnostics=diagnostics, **extra)
+    else:
+        diagnostics.merge(greedy_diagnostics)
+    return OptimizationResult(placed, unplaced, best_params, history, passes, bounds, optimal)
@@ -0,0 +1,242 @@
+"""Cache persistente de padrões de camada (SQLite em disco local).
+
+Um padrão é uma camada já resolvida: posição e orientação de cada caixa de
+um multiconjunto de caixas num piso C x L, mais a skyline que sobrou. A
+chave é o piso e o multiconjunto (dimensões originais, eixos de rotação e
+quantidade de cada tipo de caixa), então o padrão vale para qualquer carga
+cujas próximas caixas formem o mesmo multiconjunto, em qualquer ordem.
+
+Com ``pack_grouped_corrected(..., patterns=cache)``, cada camada aberta
+procura o padrão que cobre o maior trecho inicial das caixas que faltam e
+o aplica; a busca continua da skyline guardada, como se tivesse colocado
+essas caixas ela mesma. Numa carga que se repete o resultado é o mesmo de
+antes, sem a busca. Ao fim da passada as camadas são gravadas; para o mesmo
+multiconjunto fica a mais baixa. O arquivo guarda até ``max_patterns``
+padrões e descarta primeiro os usados há mais tempo.
+"""
+import json
+import os
+import sqlite3
+import time
+from array import array
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from .engine import Layer, SkuRow, SkylineLayer, Trailer
+
+# Mesmo diretório do cache de planilhas de ``cubagem.ingest``
+DEFAULT_PATH = Path(os.environ.get("CUBAGEM_CACHE_DIR", Path.home() / ".cache" / "cubagem")) / "padroes.sqlite"
+MAX_PATTERNS = 2000
+KEY_DIGITS = 6          # casas decimais das dimensões na chave
+
+BoxType = Tuple[float, float, float, Tuple[str, ...]]
+Placement = Tuple[float, float, float, float, float]     # x, y, w, d, h
+
+def box_type(c: float, l: float, a: float, rotation_axes) -> BoxType:
+    return (round(c, KEY_DIGITS), round(l, KEY_DIGITS), round(a, KEY_DIGITS), tuple(rotation_axes))
+
+def _floor_key(trailer: Trailer) -> str:
+    return f"{round(trailer.c, KEY_DIGITS)}x{round(trailer.l, KEY_DIGITS)}"
+
+def _counts_key(counts: Dict[BoxType, int]) -> str:
+    return json.dumps(sorted([*t, n] for t, n in counts.items()))
+
+def _parse_counts(key: str) -> Dict[BoxType, int]:
+    return {(c, l, a, tuple(axes)): n for c, l, a, axes, n in json.loads(key)}
+
+class LayerPattern:
+    """Camada resolvida. No disco as posições ficam num bloco binário de
+    ``double`` (x, y, w, d, h por caixa, tipos na ordem da chave), que só é
+    decodificado quando o padrão é aplicado."""
+    __slots__ = ('counts', 'height', 'key', 'sky', '_placements', '_blob')
+
+    def __init__(self, counts: Dict[BoxType, int], placements: Dict[BoxType, List[Placement]] | None,
+                 sky: List[Tuple[float, float, float]], height: float, key: str | None = None,
+                 blob: bytes | None = None):
+        self.counts = counts            # tipo -> quantidade
+        self.height = height
+        self.key = key or _counts_key(counts)
+        self.sky = sky                  # segmentos livres na ordem de criação
+        self._placements = placements   # tipo -> posições, na ordem da colocação
+        self._blob = blob
+
+    @property
+    def placements(self) -> Dict[BoxType, List[Placement]]:
+        if self._placements is None:
+            values = array('d')
+            values.frombytes(self._blob)
+            self._placements, offset = {}, 0
+            for t in sorted(self.counts):
+                it = iter(values[offset:offset + 5 * self.counts[t]])
+                self._placements[t] = list(zip(it, it, it, it, it))
+                offset += 5 * self.counts[t]
+        return self._placements
+
+    def to_blob(self) -> bytes:
+        placements = self.placements
+        return array('d', (v for t in sorted(self.counts) for p in placements[t] for v in p)).tobytes()
+
+    @classmethod
+    def from_layer(cls, layer: Layer) -> "LayerPattern":
+        counts: Dict[BoxType, int] = {}
+        placements: Dict[BoxType, List[Placement]] = {}
+        types: Dict[Tuple, BoxType] = {}
+        for b in layer.boxes:
+            raw = (b.original_c, b.original_l, b.original_a, b.rotation_axes)
+            t = types.get(raw)
+            if t is None:
+                t = types[raw] = box_type(*raw)
+            counts[t] = counts.get(t, 0) + 1
+            placements.setdefault(t, []).append((b.pos[0], b.pos[1], b.c, b.l, b.a))
+        return cls(counts, placements, layer.sky.sky, layer.height)
+
+    @classmethod
+    def from_row(cls, key: str, height: float, sky: str, blob: bytes) -> "LayerPattern":
+        return cls(_parse_counts(key), None, [tuple(seg) for seg in json.loads(sky)], height, key, blob)
+
+    def apply(self, layer: Layer, cursor: Iterable[Tuple[int, int, int, SkuRow]]):
+        """Coloca na camada (vazia) as caixas do trecho inicial de ``cursor``.
+
+        ``cursor`` dá ``(grupo, linha, primeira caixa, SkuRow)`` a partir da
+        posição atual; retorna a posição ``(grupo, linha, caixa)`` seguinte
+        ao trecho coberto pelo padrão.
+        """
+        left = dict(self.counts)
+        slots = {t: iter(ps) for t, ps in self.placements.items()}
+        remaining = sum(left.values())
+        for g, r, start, row in cursor:
+            t = box_type(row.c, row.l, row.a, row.rotation_axes)
+            n = min(left.get(t, 0), row.count - start)
+            for j in range(n):
+                x, y, w, d, h = next(slots[t])
+                b = row.box(start + j)
+                b.c, b.l, b.a = w, d, h
+                b.pos = (x, y, layer.z)
+                layer.boxes.append(b)
+            if n:
+                left[t] -= n
+                remaining -= n
+            if remaining == 0:
+                sky = layer.sky
+                layer.sky = SkylineLayer.from_segments(sky.C, sky.L, self.sky, sky.merge, sky.prefer)
+                layer.height = self.height
+                return (g, r, start + n) if start + n < row.count else (g, r + 1, 0)
+        raise ValueError("o trecho de caixas não corresponde ao padrão")
+
+class PatternIndex:
+    """Padrões de um piso, carregados em memória e agrupados pelo conjunto de tipos"""
+    def __init__(self, patterns: Iterable[LayerPattern] = ()):
+        self._by_types: Dict[frozenset, List[LayerPattern]] = {}
+        for p in patterns:
+            self._by_types.setdefault(frozenset(p.counts), []).append(p)
+
+    def __len__(self):
+        return sum(len(ps) for ps in self._by_types.values())
+
+    def match(self, cursor: Iterator[Tuple[int, int, int, SkuRow]], max_h: float,
+              floor_area: float) -> LayerPattern | None:
+        """Padrão cujo multiconjunto é o maior trecho inicial de ``cursor`` (no empate, o mais baixo).
+
+        O trecho para quando a menor área de base das caixas já passa da
+        área do piso, porque nenhuma camada comportaria todas elas.
+        """
+        if not self._by_types:
+            return None
+        taken: Dict[BoxType, int] = {}
+        area, total = 0.0, 0
+        best, best_key = None, None
+        for _, _, start, row in cursor:
+            available = row.count - start
+            t = box_type(row.c, row.l, row.a, row.rotation_axes)
+            before = taken.get(t, 0)
+            types = frozenset(taken) | {t}
+            for p in self._by_types.get(types, ()):
+                n = p.counts[t] - before
+                if not 0 < n <= available or p.height > max_h:
+                    continue
+                if any(p.counts[u] != m for u, m in taken.items() if u != t):
+                    continue
+                key = (total + n, -p.height)
+                if best_key is None or key > best_key:
+                    best, best_key = p, key
+            taken[t] = before + available
+            total += available
+            area += available * min(w * d for w, d, _ in row.orientations())
+            if area > floor_area:
+                break
+        return best
+
+class PatternCache:
+    """Arquivo SQLite de padrões, com limite de tamanho (sai o usado há mais tempo).
+
+    Só guarda o caminho: cada operação abre e fecha a conexão, então o
+    objeto vai para outros processos e vários processos podem usar o mesmo
+    arquivo.
+    """
+    def __init__(self, path: str | Path = DEFAULT_PATH, max_patterns: int = MAX_PATTERNS):
+        self.path = Path(path)
+        self.max_patterns = max_patterns
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.path, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS patterns (
+                floor TEXT NOT NULL,
+                counts TEXT NOT NULL,
+                height REAL NOT NULL,
+                sky TEXT NOT NULL,
+                positions BLOB NOT NULL,
+                used REAL NOT NULL,
+                PRIMARY KEY (floor, counts)
+            )""")
+        db.execute("CREATE INDEX IF NOT EXISTS patterns_used ON patterns (used)")
+        return db
+
+    def __len__(self):
+        with closing(self._connect()) as db:
+            return db.execute("SELECT COUNT(*) FROM patterns").fetchone()[0]
+
+    def index(self, trailer: Trailer) -> PatternIndex:
+        """Padrões guardados para o piso do trailer"""
+        with closing(self._connect()) as db:
+            rows = db.execute("SELECT counts, height, sky, positions FROM patterns WHERE floor = ?",
+                              (_floor_key(trailer),)).fetchall()
+        return PatternIndex(LayerPattern.from_row(*row) for row in rows)
+
+    def save(self, trailer: Trailer, layers: Iterable[Layer], reused: Iterable[str] = ()):
+        """Grava as camadas com caixas (fica a mais baixa de cada chave) e aplica o limite.
+
+        ``reused`` são as chaves de padrões aplicados sem alteração: só
+        passam a contar como usados agora.
+        """
+        now = time.time()
+        floor = _floor_key(trailer)
+        records = []
+        for layer in layers:
+            if layer.boxes:
+                p = LayerPattern.from_layer(layer)
+                records.append((floor, p.key, p.height, json.dumps(p.sky), p.to_blob(), now))
+        touched = [(now, floor, key) for key in reused]
+        if not (records or touched):
+            return
+        with closing(self._connect()) as db, db:
+            db.executemany("UPDATE patterns SET used = ? WHERE floor = ? AND counts = ?", touched)
+            db.executemany("""
+                INSERT INTO patterns (floor, counts, height, sky, positions, used) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (floor, counts) DO UPDATE SET
+                    used = excluded.used,
+                    height = MIN(height, excluded.height),
+                    sky = CASE WHEN excluded.height < height THEN excluded.sky ELSE sky END,
+                    positions = CASE WHEN excluded.height < height THEN excluded.positions ELSE positions END
+            """, records)
+            db.execute("""
+                DELETE FROM patterns WHERE rowid IN (
+                    SELECT rowid FROM patterns ORDER BY used DESC LIMIT -1 OFFSET ?)
+            """, (self.max_patterns,))
+
+    def clear(self):
+        with closing(self._connect()) as db, db:
+            db.execute("DELETE FROM patterns")
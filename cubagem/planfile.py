@@ -0,0 +1,151 @@
+"""Plano de carga em arquivo binário compacto (``.cubplan``).
+
+Layout (little-endian), gravado numa só escrita:
+
+- cabeçalho de tamanho fixo (``HEADER``): assinatura, versão, número de
+  caixas e de SKUs e dimensões do trailer;
+- um registro de tamanho fixo por caixa (``RECORD``), na ordem da
+  colocação: índice do SKU, número da caixa, posição e dimensões em
+  micrômetros (int32, exatas para medidas com até seis casas), código da
+  orientação e eixos de rotação permitidos;
+- tabela de SKUs: ``skus + 1`` offsets (uint32) e os nomes em UTF-8.
+
+A leitura mapeia o arquivo na memória (ou usa os bytes enviados): os
+registros são um array estruturado do numpy sobre o próprio arquivo, sem
+interpretar caixa a caixa. ``Plan.boxes()`` recria as caixas para a
+visualização e para ``analyze_packing_efficiency``.
+"""
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+
+from .engine import Box, Trailer
+
+MAGIC = b"CUBPLAN!"
+VERSION = 1
+SCALE = 1_000_000       # micrômetros por metro
+
+HEADER = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("boxes", "<u4"),
+    ("skus", "<u4"),
+    ("reserved", "<u4"),
+    ("trailer", "<f8", (3,)),
+])
+RECORD = np.dtype([
+    ("sku", "<u4"),
+    ("index", "<u4"),
+    ("pos", "<i4", (3,)),
+    ("dims", "<i4", (3,)),
+    ("orientation", "u1"),
+    ("rotation", "u1"),
+    ("reserved", "<u2"),
+])
+
+# Orientação: dimensões colocadas (w, d, h) = originais (c, l, a) nesta ordem
+ORIENTATIONS = ((0, 1, 2), (1, 0, 2), (2, 1, 0), (1, 2, 0), (0, 2, 1), (2, 0, 1))
+_INVERSE = np.array([np.argsort(p) for p in ORIENTATIONS])
+ROTATION_BITS = {"XY": 1, "XZ": 2, "YZ": 4}
+
+def _orientation_code(b: Box) -> int:
+    original = (b.original_c, b.original_l, b.original_a)
+    placed = (b.c, b.l, b.a)
+    for code, perm in enumerate(ORIENTATIONS):
+        if all(original[i] == v for i, v in zip(perm, placed)):
+            return code
+    raise ValueError(f"dimensões de {b.id} não são uma orientação da caixa")
+
+def plan_bytes(placed: Sequence[Box], trailer: Trailer) -> bytes:
+    """Conteúdo do arquivo de plano para as caixas colocadas"""
+    sku_ids = {}
+    records = np.zeros(len(placed), dtype=RECORD)
+    rows = []
+    for b in placed:
+        sku = sku_ids.setdefault(b.sku, len(sku_ids))
+        rows.append((sku, b.index or 0, *b.pos, b.c, b.l, b.a, _orientation_code(b),
+                     sum(ROTATION_BITS[axis] for axis in b.rotation_axes)))
+    if rows:
+        table = np.array(rows, dtype=np.float64)
+        records["sku"] = table[:, 0]
+        records["index"] = table[:, 1]
+        records["pos"] = np.rint(table[:, 2:5] * SCALE)
+        records["dims"] = np.rint(table[:, 5:8] * SCALE)
+        records["orientation"] = table[:, 8]
+        records["rotation"] = table[:, 9]
+
+    names = [s.encode("utf-8") for s in sku_ids]
+    offsets = np.zeros(len(names) + 1, dtype="<u4")
+    offsets[1:] = np.cumsum([len(n) for n in names])
+    header = np.zeros(1, dtype=HEADER)
+    header["magic"], header["version"] = MAGIC, VERSION
+    header["boxes"], header["skus"] = len(placed), len(names)
+    header["trailer"] = (trailer.c, trailer.l, trailer.a)
+    return b"".join([header.tobytes(), records.tobytes(), offsets.tobytes(), *names])
+
+def write_plan(path: str | Path, placed: Sequence[Box], trailer: Trailer) -> int:
+    """Grava o plano num arquivo; retorna o número de bytes"""
+    data = plan_bytes(placed, trailer)
+    with open(path, "wb") as fh:
+        fh.write(data)
+    return len(data)
+
+class Plan:
+    """Plano lido de um ``.cubplan`` (arquivo mapeado ou bytes em memória)"""
+    def __init__(self, buffer: np.ndarray):
+        if buffer.size < HEADER.itemsize:
+            raise ValueError("arquivo de plano truncado")
+        header = buffer[:HEADER.itemsize].view(HEADER)[0]
+        if header["magic"] != MAGIC:
+            raise ValueError("não é um arquivo de plano (.cubplan)")
+        if header["version"] != VERSION:
+            raise ValueError(f"versão de plano não suportada: {header['version']}")
+        n, n_skus = int(header["boxes"]), int(header["skus"])
+        start = HEADER.itemsize
+        end = start + n * RECORD.itemsize
+        offsets_end = end + (n_skus + 1) * 4
+        if buffer.size < offsets_end:
+            raise ValueError("arquivo de plano truncado")
+        self.trailer = Trailer(*(float(v) for v in header["trailer"]))
+        self.records = buffer[start:end].view(RECORD)
+        self._offsets = buffer[end:offsets_end].view("<u4")
+        self._names = buffer[offsets_end:]
+
+    @classmethod
+    def open(cls, path: str | Path) -> "Plan":
+        return cls(np.memmap(path, dtype=np.uint8, mode="r"))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Plan":
+        return cls(np.frombuffer(data, dtype=np.uint8))
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def skus(self) -> List[str]:
+        names, offsets = self._names, self._offsets
+        return [bytes(names[offsets[i]:offsets[i + 1]]).decode("utf-8") for i in range(len(offsets) - 1)]
+
+    def boxes(self) -> List[Box]:
+        """Caixas do plano, posicionadas como foram gravadas"""
+        rec = self.records
+        skus = self.skus
+        pos = (rec["pos"] / SCALE).tolist()
+        dims = rec["dims"] / SCALE
+        # Dimensões originais: desfaz a permutação da orientação
+        original = np.take_along_axis(dims, _INVERSE[rec["orientation"]], axis=1).tolist()
+        dims = dims.tolist()
+        axes_by_mask = {
+            mask: tuple(axis for axis, bit in ROTATION_BITS.items() if mask & bit)
+            for mask in range(8)
+        }
+        boxes = []
+        for sku, index, p, d, o, mask in zip(rec["sku"].tolist(), rec["index"].tolist(), pos, dims,
+                                               original, rec["rotation"].tolist()):
+            b = Box(skus[sku], *o, axes_by_mask[mask], index)
+            b.c, b.l, b.a = d
+            b.pos = tuple(p)
+            boxes.append(b)
+        return boxes
@@ -0,0 +1,141 @@
+"""Visualização 3D em WebGL (Plotly) com uma única malha para todas as caixas.
+
+A geometria (fusão de caixas e montagem da malha) é Python puro; o Plotly
+só é importado ao montar a figura.
+"""
+from typing import Dict, List, Sequence, Tuple
+
+from .engine import Box, Trailer
+
+MERGE_THRESHOLD = 1500      # acima disso, caixas vizinhas do mesmo SKU viram um bloco
+_EPS = 1e-6
+
+# Paralelepípedo: (chave de cor, x, y, z, dx, dy, dz)
+Cuboid = Tuple[str, float, float, float, float, float, float]
+
+# Câmeras equivalentes aos ângulos da versão em matplotlib
+VIEW_PRESETS = {
+    "Isométrico": {"eye": {"x": -1.4, "y": -1.6, "z": 1.0}, "up": {"x": 0, "y": 0, "z": 1}},
+    "Frontal": {"eye": {"x": 2.2, "y": 0, "z": 0}, "up": {"x": 0, "y": 0, "z": 1}},
+    "Lateral": {"eye": {"x": 0, "y": 2.2, "z": 0}, "up": {"x": 0, "y": 0, "z": 1}},
+    "Superior": {"eye": {"x": 0, "y": 0, "z": 2.5}, "up": {"x": 0, "y": 1, "z": 0}},
+}
+
+# Triângulos de um paralelepípedo sobre os 8 vértices de _corners
+_TRIANGLES = [
+    (0, 1, 2), (0, 2, 3), (4, 5, 6), (4, 6, 7),     # base e topo
+    (0, 1, 5), (0, 5, 4), (3, 2, 6), (3, 6, 7),     # frente e fundo
+    (0, 3, 7), (0, 7, 4), (1, 2, 6), (1, 6, 5),     # laterais
+]
+_EDGES = [(0, 1), (1, 2), (2, 3), (3, 0), (4, 5), (5, 6), (6, 7), (7, 4),
+          (0, 4), (1, 5), (2, 6), (3, 7)]
+
+def _corners(x, y, z, dx, dy, dz):
+    return [(x, y, z), (x + dx, y, z), (x + dx, y + dy, z), (x, y + dy, z),
+            (x, y, z + dz), (x + dx, y, z + dz), (x + dx, y + dy, z + dz), (x, y + dy, z + dz)]
+
+def color_key(box: Box) -> str:
+    return box.id.split('-')[0]
+
+def box_cuboids(placed: Sequence[Box]) -> List[Cuboid]:
+    return [(color_key(b), *b.pos, b.c, b.l, b.a) for b in placed]
+
+def _merge_axis(cuboids: List[Cuboid], axis: int) -> List[Cuboid]:
+    """Funde paralelepípedos encostados ao longo de um eixo (0=x, 1=y, 2=z)"""
+    others = [k for k in range(3) if k != axis]
+    rows: Dict[tuple, List[Cuboid]] = {}
+    for cb in cuboids:
+        key = (cb[0], *(round(cb[1 + k], 6) for k in others), *(round(cb[4 + k], 6) for k in others))
+        rows.setdefault(key, []).append(cb)
+
+    merged: List[Cuboid] = []
+    for row in rows.values():
+        row.sort(key=lambda cb: cb[1 + axis])
+        cur = list(row[0])
+        for cb in row[1:]:
+            if abs(cb[1 + axis] - (cur[1 + axis] + cur[4 + axis])) < _EPS:
+                cur[4 + axis] += cb[4 + axis]
+            else:
+                merged.append(tuple(cur))
+                cur = list(cb)
+        merged.append(tuple(cur))
+    return merged
+
+def merge_cuboids(cuboids: List[Cuboid]) -> List[Cuboid]:
+    """Funde caixas vizinhas de mesma cor em blocos maiores (x, depois y, depois z)"""
+    for axis in range(3):
+        cuboids = _merge_axis(cuboids, axis)
+    return cuboids
+
+def build_mesh(cuboids: List[Cuboid], palette: Sequence[str]):
+    """Vértices, triângulos, cores por triângulo e arestas de todos os blocos"""
+    xs, ys, zs = [], [], []
+    ii, jj, kk = [], [], []
+    colors: List[str] = []
+    ex, ey, ez = [], [], []
+    color_of: Dict[str, str] = {}
+    for n, (key, x, y, z, dx, dy, dz) in enumerate(cuboids):
+        color = color_of.setdefault(key, palette[len(color_of) % len(palette)])
+        pts = _corners(x, y, z, dx, dy, dz)
+        for px, py, pz in pts:
+            xs.append(px); ys.append(py); zs.append(pz)
+        base = 8 * n
+        for a, b, c in _TRIANGLES:
+            ii.append(base + a); jj.append(base + b); kk.append(base + c)
+        colors.extend([color] * len(_TRIANGLES))
+        for a, b in _EDGES:
+            ex += [pts[a][0], pts[b][0], None]
+            ey += [pts[a][1], pts[b][1], None]
+            ez += [pts[a][2], pts[b][2], None]
+    return (xs, ys, zs), (ii, jj, kk), colors, (ex, ey, ez)
+
+def _trailer_edges(trailer: Trailer):
+    pts = _corners(0, 0, 0, trailer.c, trailer.l, trailer.a)
+    ex, ey, ez = [], [], []
+    for a, b in _EDGES:
+        ex += [pts[a][0], pts[b][0], None]
+        ey += [pts[a][1], pts[b][1], None]
+        ez += [pts[a][2], pts[b][2], None]
+    return ex, ey, ez
+
+def packing_figure(placed: Sequence[Box], trailer: Trailer, alpha: float = 0.85,
+                   show_wireframe: bool = True, view: str = "Isométrico", title: str = "",
+                   merge_threshold: int = MERGE_THRESHOLD):
+    """Figura Plotly com uma malha (Mesh3d) para todas as caixas colocadas.
+
+    Com mais de ``merge_threshold`` caixas, vizinhas do mesmo SKU são
+    fundidas em blocos; o navegador desenha a cena, não o servidor.
+    """
+    import plotly.colors
+    import plotly.graph_objects as go
+
+    cuboids = box_cuboids(placed)
+    if len(cuboids) > merge_threshold:
+        cuboids = merge_cuboids(cuboids)
+    (xs, ys, zs), (ii, jj, kk), colors, edges = build_mesh(
+        cuboids, plotly.colors.qualitative.Light24 + plotly.colors.qualitative.Dark24)
+
+    fig = go.Figure()
+    if cuboids:
+        fig.add_trace(go.Mesh3d(x=xs, y=ys, z=zs, i=ii, j=jj, k=kk, facecolor=colors,
+                                opacity=alpha, flatshading=True, hoverinfo="skip", name="caixas"))
+        fig.add_trace(go.Scatter3d(x=edges[0], y=edges[1], z=edges[2], mode="lines",
+                                   line={"color": "black", "width": 1}, hoverinfo="skip", name="arestas"))
+    if show_wireframe:
+        ex, ey, ez = _trailer_edges(trailer)
+        fig.add_trace(go.Scatter3d(x=ex, y=ey, z=ez, mode="lines",
+                                   line={"color": "red", "width": 4}, hoverinfo="skip", name="trailer"))
+    fig.update_layout(
+        title=title,
+        showlegend=False,
+        height=700,
+        margin={"l": 0, "r": 0, "t": 40, "b": 0},
+        scene={
+            "xaxis": {"title": "Comprimento (m)", "range": [0, trailer.c]},
+            "yaxis": {"title": "Largura (m)", "range": [0, trailer.l]},
+            "zaxis": {"title": "Altura (m)", "range": [0, trailer.a]},
+            "aspectmode": "data",
+            "camera": VIEW_PRESETS[view],
+        },
+    )
+    return fig
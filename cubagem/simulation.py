@@ -0,0 +1,109 @@
+"""Simulação completa (carga, empacotamento e análise), sem Streamlit.
+
+É o que a tela executa, separado dela para poder rodar num processo da
+fila de trabalhos (``cubagem.jobs``). ``progress(**campos)`` recebe o
+andamento: ``stage`` e, conforme a etapa, ``total``, ``placed``,
+``layers``, ``fraction``, ``passes`` ou ``vehicles``. O resultado traz os
+limites de ``cubagem.bounds`` para a tela mostrar a distância do ótimo.
+"""
+from typing import Callable, List
+
+from .bounds import packing_bounds
+from .diagnostics import NULL_DIAGNOSTICS, Diagnostics
+from .engine import Trailer, analyze_packing_efficiency, pack_grouped_corrected
+from .fleet import pack_fleet
+from .ingest import expand_grouped_with_rotation, is_csv_source, load_files, stream_inventory
+from .optimizer import optimize_packing
+from .patterns import PatternCache
+
+def _no_progress(**fields):
+    pass
+
+def load_inventory(car_src, med_src, rotation_axes, stream: bool = False,
+                   diagnostics: Diagnostics = NULL_DIAGNOSTICS):
+    """Lê as planilhas e monta o inventário.
+
+    Retorna ``(inventário, SKUs sem medidas, em fluxo?, linhas válidas)``;
+    CSV sempre é lido em fluxo.
+    """
+    import pandas as pd
+
+    streamed = stream or is_csv_source(car_src) or is_csv_source(med_src)
+    if streamed:
+        with diagnostics.stage("stream_inventory"):
+            inventory, missing_skus = stream_inventory(car_src, med_src, rotation_axes)
+        missing = pd.DataFrame({"COD SKU": missing_skus})
+        loaded_rows = sum(1 for _ in inventory.rows())
+    else:
+        with diagnostics.stage("load_files"):
+            merged, missing = load_files(car_src, med_src)
+        loaded_rows = len(merged)
+
+        # Cria grupos com rotação
+        with diagnostics.stage("expand"):
+            inventory = expand_grouped_with_rotation(merged, rotation_axes)
+    return inventory, missing, streamed, loaded_rows
+
+def run_simulation(car_src, med_src, trailer: Trailer, rotation_axes, block: bool = True,
+                   stream: bool = False, opt_budget: float | None = None,
+                   fleet_trailers: List[Trailer] | None = None,
+                   diagnostics: Diagnostics = NULL_DIAGNOSTICS, packer: Callable = pack_grouped_corrected,
+                   progress: Callable[..., None] = _no_progress,
+                   patterns: PatternCache | None = None, workers: int | None = None) -> dict:
+    """Carrega, empacota e analisa; devolve tudo o que a tela precisa.
+
+    Usa o otimizador se ``opt_budget`` for dado, o modo frota se
+    ``fleet_trailers`` for dado e uma passada de ``packer`` nos demais casos.
+    Os dois juntos não são suportados (``ValueError``). ``workers`` limita
+    os processos do otimizador e do modo frota (padrão: um por núcleo).
+    ``patterns`` (só para o motor em camadas) é usado na passada única e na
+    passada final do otimizador.
+    """
+    if opt_budget and fleet_trailers is not None:
+        raise ValueError("o otimizador não funciona no modo frota")
+
+    # Carrega dados
+    progress(stage="load")
+    inventory, missing, streamed, loaded_rows = load_inventory(car_src, med_src, rotation_axes, stream,
+                                                               diagnostics)
+    total = len(inventory)
+    result = {"streamed": streamed, "loaded_rows": loaded_rows, "total_boxes": total, "missing": missing,
+              "trailer": trailer, "opt_result": None, "fleet": None, "diagnostics": diagnostics}
+
+    # Executa empacotamento
+    with diagnostics.stage("pack"):
+        if opt_budget:
+            progress(stage="optimize", total=total, fraction=0.0)
+            opt_result = optimize_packing(
+                trailer, inventory, time_budget=opt_budget, block=block,
+                on_progress=lambda t, vol, n: progress(
+                    stage="optimize", fraction=min(t / opt_budget, 1.0), passes=n,
+                    volume_efficiency=vol / trailer.volume * 100),
+                diagnostics=diagnostics, packer=packer, patterns=patterns, workers=workers,
+            )
+            result.update(opt_result=opt_result, placed=opt_result.placed, unplaced=opt_result.unplaced,
+                          bounds=opt_result.bounds)
+        elif fleet_trailers is not None:
+            progress(stage="fleet", total=total, vehicles=0)
+            fleet = pack_fleet(fleet_trailers, inventory, block=block, workers=workers,
+                               diagnostics=diagnostics, packer=packer,
+                               on_progress=lambda used, left: progress(stage="fleet", vehicles=used,
+                                                                       placed=total - left))
+            result.update(fleet=fleet, fleet_size=len(fleet_trailers), unplaced=fleet.unplaced)
+        else:
+            progress(stage="pack", total=total, placed=0, layers=0)
+            extra = {"patterns": patterns} if patterns is not None else {}
+            placed, unplaced = packer(trailer, inventory, block=block, diagnostics=diagnostics,
+                                      on_progress=lambda n, layers: progress(stage="pack", placed=n,
+                                                                             layers=layers), **extra)
+            result.update(placed=placed, unplaced=unplaced)
+
+    # Análise detalhada
+    if result["fleet"] is None:
+        progress(stage="analyze")
+        with diagnostics.stage("analyze"):
+            result["analysis"] = analyze_packing_efficiency(result["placed"], trailer, result["unplaced"])
+        if "bounds" not in result:
+            with diagnostics.stage("bounds"):
+                result["bounds"] = packing_bounds(inventory, trailer)
+    return result
@@ -0,0 +1,152 @@
+"""Varredura de cenários: a mesma carga em vários veículos e rotações.
+
+A carga é lida e expandida uma só vez; cada cenário (dimensões do veículo
+e eixos de rotação permitidos) é uma passada do motor num processo do
+pool, que recebe o inventário uma vez, no initializer. O resultado é uma
+tabela ordenada: menos caixas de fora, depois maior ocupação, depois
+menor altura usada.
+"""
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from .diagnostics import NULL_DIAGNOSTICS, Diagnostics
+from .engine import BoxInventory, SkuRow, Trailer, analyze_packing_efficiency, pack_grouped_corrected
+from .simulation import _no_progress, load_inventory
+
+ROTATION_AXES = ("XY", "XZ", "YZ")
+
+def rotation_combos() -> List[Tuple[str, ...]]:
+    """Todas as combinações não vazias de eixos de rotação"""
+    return [combo for n in range(1, len(ROTATION_AXES) + 1)
+            for combo in itertools.combinations(ROTATION_AXES, n)]
+
+class Scenario:
+    def __init__(self, name: str, trailer: Trailer, rotation_axes: Sequence[str]):
+        self.name = name
+        self.trailer = trailer
+        self.rotation_axes = tuple(rotation_axes)
+
+    @property
+    def key(self) -> Tuple:
+        return (self.trailer.c, self.trailer.l, self.trailer.a, self.rotation_axes)
+
+def scenario_grid(profiles: Sequence[Tuple[str, Trailer]],
+                  combos: Sequence[Sequence[str]]) -> List[Scenario]:
+    """Cada perfil de veículo com cada combinação de rotações"""
+    return [Scenario(name, trailer, axes) for name, trailer in profiles for axes in combos]
+
+def with_rotation(inventory: BoxInventory, rotation_axes: Sequence[str]) -> BoxInventory:
+    """Mesmo inventário com outros eixos de rotação (copia só as linhas)"""
+    axes = tuple(rotation_axes)
+    return BoxInventory([
+        [r if r.rotation_axes == axes else SkuRow(r.sku, r.c, r.l, r.a, r.count, r.first, axes) for r in g]
+        for g in inventory.groups
+    ])
+
+class ScenarioResult:
+    def __init__(self, scenario: Scenario, placed: int, unplaced: int, analysis: Dict):
+        self.scenario = scenario
+        self.placed = placed            # caixas colocadas
+        self.unplaced = unplaced        # caixas que ficaram de fora
+        self.volume_efficiency = analysis.get("volume_efficiency", 0.0)
+        self.height_usage = analysis.get("height_usage", 0.0)
+
+    @property
+    def rank_key(self) -> Tuple[int, float, float]:
+        return (self.unplaced, -self.volume_efficiency, self.height_usage)
+
+class SweepResult:
+    def __init__(self, results: List[ScenarioResult]):
+        self.results = sorted(results, key=lambda r: r.rank_key)
+
+    @property
+    def best(self) -> ScenarioResult | None:
+        return self.results[0] if self.results else None
+
+    def summary(self) -> List[Dict]:
+        return [
+            {
+                "Posição": n,
+                "Cenário": r.scenario.name,
+                "Dimensões (CxLxA)": "{:.2f}x{:.2f}x{:.2f}".format(*r.scenario.key[:3]),
+                "Rotações": "+".join(r.scenario.rotation_axes),
+                "Caixas": r.placed,
+                "Não Empacotadas": r.unplaced,
+                "Ocupação (%)": round(r.volume_efficiency, 1),
+                "Altura Utilizada (%)": round(r.height_usage, 1),
+            }
+            for n, r in enumerate(self.results, 1)
+        ]
+
+# Estado de cada processo do pool (enviado uma vez, no initializer)
+_worker_state: Dict = {}
+
+def _init_worker(inventory: BoxInventory, block: bool, packer: Callable):
+    _worker_state.update(inventory=inventory, block=block, packer=packer, rotated={})
+
+def _pack_scenario(dims: Tuple[float, float, float], rotation_axes: Tuple[str, ...]):
+    """Uma passada do motor; devolve só os números do cenário"""
+    rotated = _worker_state["rotated"]
+    if rotation_axes not in rotated:
+        rotated[rotation_axes] = with_rotation(_worker_state["inventory"], rotation_axes)
+    trailer = Trailer(*dims)
+    placed, unplaced = _worker_state["packer"](trailer, rotated[rotation_axes], block=_worker_state["block"])
+    return len(placed), len(unplaced), analyze_packing_efficiency(placed, trailer, unplaced)
+
+def sweep_scenarios(inventory: BoxInventory, scenarios: Sequence[Scenario], block: bool = True,
+                    workers: int | None = None, diagnostics: Diagnostics = NULL_DIAGNOSTICS,
+                    packer: Callable = pack_grouped_corrected,
+                    on_progress: Callable[[int, int], None] | None = None) -> SweepResult:
+    """Empacota ``inventory`` em cada cenário, em paralelo, e ordena os resultados.
+
+    Cenários repetidos (mesmas dimensões e rotações) são empacotados uma só
+    vez. ``packer`` deve ser uma função de módulo com a interface de
+    ``pack_grouped_corrected``. ``on_progress(cenários prontos, total)`` é
+    chamado a cada cenário concluído.
+    """
+    distinct: Dict[Tuple, Scenario] = {}
+    for s in scenarios:
+        distinct.setdefault(s.key, s)
+    diagnostics.count("sweep_scenarios", len(scenarios))
+    diagnostics.count("sweep_scenarios_packed", len(distinct))
+
+    outcomes: Dict[Tuple, Tuple] = {}
+    if distinct:
+        pool = ProcessPoolExecutor(
+            max_workers=min(workers or os.cpu_count() or 1, len(distinct)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(inventory, block, packer),
+        )
+        try:
+            futures = {
+                pool.submit(_pack_scenario, (s.trailer.c, s.trailer.l, s.trailer.a), s.rotation_axes): key
+                for key, s in distinct.items()
+            }
+            for f in as_completed(futures):
+                outcomes[futures[f]] = f.result()
+                if on_progress is not None:
+                    on_progress(len(outcomes), len(distinct))
+        finally:
+            pool.shutdown(cancel_futures=True)
+    return SweepResult([ScenarioResult(s, *outcomes[s.key]) for s in scenarios])
+
+def run_sweep(car_src, med_src, scenarios: Sequence[Scenario], block: bool = True, stream: bool = False,
+              diagnostics: Diagnostics = NULL_DIAGNOSTICS, packer: Callable = pack_grouped_corrected,
+              progress: Callable[..., None] = _no_progress, workers: int | None = None) -> dict:
+    """Carrega as planilhas uma vez e compara os cenários (como ``run_simulation``)"""
+    progress(stage="load")
+    rotation_axes = scenarios[0].rotation_axes if scenarios else ROTATION_AXES[:1]
+    inventory, missing, streamed, loaded_rows = load_inventory(car_src, med_src, rotation_axes, stream,
+                                                               diagnostics)
+    progress(stage="sweep", done=0, total=len({s.key for s in scenarios}))
+    with diagnostics.stage("sweep"):
+        sweep = sweep_scenarios(inventory, scenarios, block=block, workers=workers, diagnostics=diagnostics,
+                                packer=packer,
+                                on_progress=lambda done, total: progress(stage="sweep", done=done,
+                                                                         total=total))
+    return {"streamed": streamed, "loaded_rows": loaded_rows, "total_boxes": len(inventory),
+            "missing": missing, "sweep": sweep, "diagnostics": diagnostics}
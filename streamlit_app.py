@@ -1,265 +1,299 @@
-import math
-import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.cm as cm
-from typing import List, Tuple, Dict
-from matplotlib.colors import ListedColormap
-from mpl_toolkits.mplot3d.art3d import Poly3DCollection
-
-# =================== CLASSES CORRIGIDAS ===================
-class Box:
-    def __init__(self, sku: str, c: float, l: float, a: float, rotation_axes: List[str] = None):
-        self.id = sku
-        self.original_c, self.original_l, self.original_a = c, l, a
-        self.c, self.l, self.a = c, l, a
-        self.pos: Tuple[float, float, float] | None = None
-        self.rotation_axes = rotation_axes or ['XY']
-        self.used_orientation = None
-
-    def orientations(self):
-        """Retorna orientações possíveis como (largura_base, profundidade_base) mantendo altura fixa"""
-        orientations = []
-        
-        # Orientação original (comprimento x largura)
-        orientations.append((self.original_c, self.original_l))
-        
-        # Rotação XY (largura x comprimento) - apenas troca no plano horizontal
-        if 'XY' in self.rotation_axes:
-            orientations.append((self.original_l, self.original_c))
-            
-        # Para rotações verticais, precisamos considerar altura também
-        if 'XZ' in self.rotation_axes:
-            # Comprimento vira altura, altura vira comprimento
-            orientations.append((self.original_a, self.original_l))
-            orientations.append((self.original_l, self.original_a))
-            
-        if 'YZ' in self.rotation_axes:
-            # Largura vira altura, altura vira largura  
-            orientations.append((self.original_c, self.original_a))
-            orientations.append((self.original_a, self.original_c))
-        
-        # Remove duplicatas
-        unique_orientations = list(set(orientations))
-        return unique_orientations
-
-    @property
-    def volume(self):
-        return self.original_c * self.original_l * self.original_a
-
-class Trailer:
-    def __init__(self, c: float, l: float, a: float):
-        self.c, self.l, self.a = c, l, a
-
-    @property
-    def volume(self):
-        return self.c * self.l * self.a
-
-class SkylineLayer:
-    """Algoritmo Skyline original - corrigido e funcional"""
-    def __init__(self, C: float, L: float):
-        self.C, self.L = C, L
-        self.sky = [(0.0, 0.0, C)]
-
-    def place(self, b: Box):
-        """Tenta todas as orientações da caixa e escolhe a melhor posição"""
-        best_position = None
-        best_orientation = None
-        best_waste = float('inf')
-        
-        for w, d in b.orientations():
-            # Verifica todas as posições possíveis na skyline
-            for i, (x, y, fx) in enumerate(self.sky):
-                if w <= fx and y + d <= self.L:
-                    # Calcula desperdício de espaço
-                    waste = fx - w
-                    if waste < best_waste:
-                        best_waste = waste
-                        best_position = i
-                        best_orientation = (w, d)
-        
-        if best_position is not None:
-            i = best_position
-            w, d = best_orientation
-            x, y, fx = self.sky[i]
-            
-            # Atualiza dimensões da caixa para a orientação escolhida
-            altura_atual = b.original_a
-            if 'XZ' in b.rotation_axes and (w == b.original_a or d == b.original_a):
-                if w == b.original_a and d == b.original_l:
-                    altura_atual = b.original_c
-                elif w == b.original_l and d == b.original_a:
-                    altura_atual = b.original_c
-            elif 'YZ' in b.rotation_axes and (w == b.original_a or d == b.original_a):
-                if w == b.original_c and d == b.original_a:
-                    altura_atual = b.original_l
-                elif w == b.original_a and d == b.original_c:
-                    altura_atual = b.original_l
-            
-            # Atualiza a skyline
-            self.sky[i] = (x + w, y, fx - w)
-            self.sky.append((x, y + d, w))
-            
-            # Limpa entradas inválidas da skyline
-            self.sky = [(sx, sy, sfw) for sx, sy, sfw in self.sky if sfw > 0]
-            
-            # Atualiza dimensões da caixa
-            b.c, b.l, b.a = w, d, altura_atual
-            b.used_orientation = f"{w:.2f}x{d:.2f}x{altura_atual:.2f}"
-            
-            return True, (x, y)
-        
-        return False, None
-
-# =================== FUNÇÕES DE CÁLCULO CORRIGIDAS ===================
-def pack_grouped_corrected(trailer: Trailer, sku_groups: List[List[Box]]):
-    """Algoritmo de empacotamento original corrigido com rotações"""
-    placed: List[Box] = []
-    unplaced: List[Box] = []
-    z = 0.0
-    layer = SkylineLayer(trailer.c, trailer.l)
-    layer_h = 0.0
-
-    for g_idx, group in enumerate(sku_groups):
-        # Ordena por área da base (maior primeiro)
-        group.sort(key=lambda b: max([w*d for w, d in b.orientations()]), reverse=True)
-        idx = 0
-        
-        while idx < len(group):
-            b = group[idx]
-            ok, pos = layer.place(b)
-            
-            if ok:
-                b.pos = (*pos, z)
-                placed.append(b)
-                layer_h = max(layer_h, b.a)
-                idx += 1
-            else:
-                # Se não coube, tenta próxima camada
-                if layer_h == 0.0:
-                    # Se nem o primeiro item coube, marca como não colocado
-                    unplaced.extend(group[idx:])
-                    idx = len(group)
-                else:
-                    # Nova camada
-                    z += layer_h
-                    if z + max([b.a for b in group[idx:] if hasattr(b, 'a')], default=[0])[0] > trailer.a:
-                        # Não cabe mais em altura
-                        unplaced.extend(group[idx:])
-                        # Adiciona todos os grupos restantes
-                        for rest_group in sku_groups[g_idx + 1:]:
-                            unplaced.extend(rest_group)
-                        return placed, unplaced
-                    
-                    layer = SkylineLayer(trailer.c, trailer.l)
-                    layer_h = 0.0
-    
-    return placed, unplaced
-
-def load_files(car_path, med_path):
-    """Função de carregamento de arquivos - mantida original"""
-    car = pd.read_excel(car_path, engine="openpyxl")
-    med = pd.read_excel(med_path, engine="openpyxl")
+import hashlib
+import io
+import json
+from collections import OrderedDict
 
-    med["KEY"] = med.apply(
-        lambda r: f"{str(r['COD FAMILIA'])}-{str(r['COD TAMANHO'])}-{int(r['QMM'])}", axis=1)
-    
-    car["KEY"] = car.apply(
-        lambda r: f"{r['COD SKU'].split('-')[0]}-{r['COD SKU'].split('-')[2]}-{r['QMM']}", axis=1)
+import pandas as pd
+import streamlit as st
 
-    merged = car.merge(
-        med[["KEY", "ALTURA", "LARGURA", "COMPRIMENTO"]],
-        on="KEY",
-        how="left",
-    )
-    missing = merged[merged["ALTURA"].isna()]
-    merged = merged.dropna(subset=["ALTURA"])
-    return merged, missing
-
-def expand_grouped_with_rotation(df: pd.DataFrame, rotation_axes: List[str]) -> List[List[Box]]:
-    """Expande grupos com configuração de rotação"""
-    groups: Dict[str, List[Box]] = {}
-    order: List[str] = []
-    
-    for _, r in df.iterrows():
-        sku = r["COD SKU"]
-        if sku not in groups:
-            groups[sku] = []
-            order.append(sku)
-        qmm = r["QMM"]
-        if qmm == 0 or math.isnan(qmm):
-            continue
-        n = math.ceil(r["QTDE"] / qmm)
-        for i in range(1, n + 1):
-            groups[sku].append(
-                Box(f"{sku}-{i}", r["COMPRIMENTO"], r["LARGURA"], r["ALTURA"], rotation_axes)
-            )
-    return [groups[k] for k in order]
-
-# =================== FUNÇÕES DE VISUALIZAÇÃO ===================
-def add_box(ax, x, y, z, dx, dy, dz, color, alpha=0.85):
-    """Adiciona uma caixa 3D ao gráfico"""
-    faces = [
-        [(x, y, z), (x + dx, y, z), (x + dx, y + dy, z), (x, y + dy, z)],
-        [(x, y, z + dz), (x + dx, y, z + dz), (x + dx, y + dy, z + dz), (x, y + dy, z + dz)],
-        [(x, y, z), (x + dx, y, z), (x + dx, y, z + dz), (x, y, z + dz)],
-        [(x, y + dy, z), (x + dx, y + dy, z), (x + dx, y + dy, z + dz), (x, y + dy, z + dz)],
-        [(x, y, z), (x, y + dy, z), (x, y + dy, z + dz), (x, y, z + dz)],
-        [(x + dx, y, z), (x + dx, y + dy, z), (x + dx, y + dy, z + dz), (x + dx, y, z + dz)],
+from cubagem.diagnostics import NULL_DIAGNOSTICS, Diagnostics
+from cubagem.engine import BoxInventory, Trailer, analyze_packing_efficiency, pack_grouped_corrected
+from cubagem.extreme_point import pack_extreme_points
+from cubagem.jobs import PENDING, RUNNING, JobCancelled, JobQueue
+from cubagem.patterns import PatternCache
+from cubagem.planfile import Plan, plan_bytes
+from cubagem.render import VIEW_PRESETS, packing_figure
+from cubagem.simulation import run_simulation
+from cubagem.sweep import Scenario, rotation_combos, run_sweep
+
+# =================== SIMULAÇÃO ===================
+RESULTS_CACHE_SIZE = 3      # simulações guardadas por sessão (LRU)
+PACKERS = {
+    "🧱 Camadas (skyline)": pack_grouped_corrected,
+    "🧊 Pontos extremos 3D": pack_extreme_points,
+}
+
+def simulation_key(car_file, med_file, options: dict) -> str:
+    """Hash dos arquivos enviados e das opções que alteram o empacotamento"""
+    h = hashlib.sha256()
+    for f in (car_file, med_file):
+        h.update(hashlib.sha256(f.getvalue()).digest())
+    h.update(json.dumps(options, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+def _uploaded(f) -> io.BytesIO:
+    """Cópia em memória do arquivo enviado, que pode ir para outro processo"""
+    buf = io.BytesIO(f.getvalue())
+    buf.name = f.name
+    return buf
+
+def fleet_trailers_from(fleet_df: pd.DataFrame) -> list:
+    """Um ``Trailer`` por veículo da tabela da frota (linhas incompletas ignoradas)"""
+    return [
+        Trailer(r["Comprimento"], r["Largura"], r["Altura"])
+        for r in fleet_df.dropna().to_dict("records")
+        for _ in range(int(r["Quantidade"]))
     ]
-    ax.add_collection3d(
-        Poly3DCollection(faces, facecolors=color, edgecolors="black", linewidths=0.5, alpha=alpha)
-    )
 
-def add_trailer_wireframe(ax, trailer):
-    """Adiciona wireframe do trailer"""
-    # Contorno do trailer
-    corners = [
-        [0, 0, 0], [trailer.c, 0, 0], [trailer.c, trailer.l, 0], [0, trailer.l, 0],
-        [0, 0, trailer.a], [trailer.c, 0, trailer.a], [trailer.c, trailer.l, trailer.a], [0, trailer.l, trailer.a]
+def scenarios_from(profiles_df: pd.DataFrame, combos: list) -> list:
+    """Cenários da varredura: cada perfil da tabela com cada combinação de rotações"""
+    profiles = [
+        (str(r["Nome"]), Trailer(r["Comprimento"], r["Largura"], r["Altura"]))
+        for r in profiles_df.dropna().to_dict("records")
     ]
+    return [Scenario(name, trailer, axes.split("+")) for name, trailer in profiles for axes in combos]
+
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    """Fila de trabalhos do servidor, compartilhada entre as sessões"""
+    return JobQueue()
+
+def progress_text(progress: dict) -> tuple:
+    """Fração e texto da barra para o último andamento de um trabalho"""
+    stage = progress.get("stage")
+    if stage == "optimize":
+        return (progress.get("fraction", 0.0),
+                f"🎯 {progress.get('passes', 0)} tentativas · melhor ocupação "
+                f"{progress.get('volume_efficiency', 0.0):.1f}%")
+    if stage in ("pack", "fleet"):
+        total = progress.get("total") or 1
+        placed = progress.get("placed", 0)
+        if stage == "fleet":
+            detail = f" · {progress.get('vehicles', 0)} veículos"
+        else:
+            # Motor de pontos extremos não tem camadas (informa 0)
+            detail = f" · {progress['layers']} camadas" if progress.get("layers") else ""
+        return min(placed / total, 1.0), f"📦 {placed} de {total} caixas{detail}"
+    if stage == "sweep":
+        total = progress.get("total") or 1
+        done = progress.get("done", 0)
+        return min(done / total, 1.0), f"🔀 {done} de {total} cenários"
+    if stage == "analyze":
+        return 1.0, "📊 Analisando..."
+    if stage is None:
+        return 0.0, "⏳ Na fila..."
+    return 0.0, "📂 Carregando dados..."
+
+@st.fragment(run_every=0.5)
+def job_monitor(queue: JobQueue, run_key: str):
+    """Acompanha o trabalho da simulação atual até ele terminar"""
+    jobs = st.session_state["packing_jobs"]
+    job_id = jobs[run_key]
+    status = queue.status(job_id)
+    if status in (PENDING, RUNNING):
+        fraction, text = progress_text(queue.progress(job_id))
+        st.progress(fraction, text=text)
+        if st.button("⏹️ Cancelar", key=f"cancel_{job_id}"):
+            queue.cancel(job_id)
+        return
+
+    del jobs[run_key]
+    try:
+        result = queue.result(job_id)
+    except JobCancelled:
+        st.warning("⏹️ Simulação cancelada")
+        return
+    except Exception as e:
+        st.error(f"❌ ERRO: {str(e)}")
+        st.exception(e)
+        return
+    finally:
+        queue.forget(job_id)
+
+    results: OrderedDict = st.session_state["packing_results"]
+    results[run_key] = result
+    while len(results) > RESULTS_CACHE_SIZE:
+        results.popitem(last=False)
+    st.rerun()
+
+def plan_result(plan_file) -> dict:
+    """Resultado para ``render_results`` a partir de um plano salvo, sem empacotar de novo"""
+    plan = Plan.from_bytes(plan_file.getvalue())
+    placed = plan.boxes()
+    return {"plan_file": plan_file.name, "total_boxes": len(placed), "missing": pd.DataFrame({"COD SKU": []}),
+            "trailer": plan.trailer, "opt_result": None, "fleet": None, "diagnostics": NULL_DIAGNOSTICS,
+            "placed": placed, "unplaced": BoxInventory(), "analysis": analyze_packing_efficiency(placed, plan.trailer)}
+
+def render_loaded(result: dict):
+    """Mensagens da leitura das planilhas"""
+    if "plan_file" in result:
+        st.success(f"📂 Plano carregado: {result['plan_file']}")
+    elif result["streamed"]:
+        st.success(f"✅ Dados carregados: {result['loaded_rows']} tipos de caixa válidos")
+    else:
+        st.success(f"✅ Dados carregados: {result['loaded_rows']} itens válidos")
+    st.info(f"📦 Total de caixas a serem empacotadas: {result['total_boxes']}")
+
+def render_sweep(result: dict):
+    """Tabela da varredura de cenários, do melhor para o pior"""
+    render_loaded(result)
+    sweep = result["sweep"]
+    st.subheader("🔀 CENÁRIOS")
+    best = sweep.best
+    if best is not None:
+        st.success(f"🏆 Melhor cenário: {best.scenario.name} com rotações {'+'.join(best.scenario.rotation_axes)} · "
+                   f"{best.volume_efficiency:.1f}% de ocupação · {best.unplaced} caixas de fora")
+    st.dataframe(pd.DataFrame(sweep.summary()), hide_index=True, use_container_width=True)
+    st.caption("Ordem: menos caixas de fora, depois maior ocupação, depois menor altura utilizada")
+    if not result["missing"].empty:
+        st.warning(f"⚠️ {result['missing']['COD SKU'].nunique()} SKUs sem medidas ficaram fora da comparação")
+
+    if result["diagnostics"].enabled:
+        render_diagnostics(result["diagnostics"])
+
+def render_results(result: dict):
+    """Desenha um resultado guardado (sem recalcular o empacotamento)"""
+    render_loaded(result)
+    unplaced, missing, opt_result, fleet = (result[k] for k in ("unplaced", "missing", "opt_result", "fleet"))
+
+    if fleet is not None:
+        st.subheader("🚚 FROTA")
+        st.metric("Veículos Utilizados", f"{fleet.vehicles_used} de {result['fleet_size']}",
+                  delta=f"mínimo {fleet.min_vehicles}", delta_color="off",
+                  help="Limite inferior de veículos pelo volume e pelas caixas que não dividem veículo")
+        st.dataframe(pd.DataFrame(fleet.summary()), hide_index=True, use_container_width=True)
+        if not fleet.vehicles:
+            st.error("❌ Nenhum veículo comporta as caixas")
+            return
+        vehicle_no = st.selectbox("Veículo exibido", range(1, fleet.vehicles_used + 1))
+        vehicle = fleet.vehicles[vehicle_no - 1]
+        trailer, placed, analysis = vehicle.trailer, vehicle.placed, vehicle.analysis
+        bounds = None
+    else:
+        trailer, placed, analysis = result["trailer"], result["placed"], result["analysis"]
+        bounds = result.get("bounds")
+
+    # Calcula estatísticas
+    vol_total = trailer.volume
+    vol_usado = sum(b.volume for b in placed)
+    eficiencia = (vol_usado / vol_total) * 100 if vol_total > 0 else 0
+
+    # Distância dos limites (ocupação máxima e altura mínima possíveis)
+    occupancy_delta = height_delta = None
+    if bounds is not None:
+        occupancy_gap, height_gap = bounds.gap(vol_usado, analysis.get("max_height_used", 0))
+        occupancy_delta = f"limite {bounds.volume_efficiency:.1f}% · gap {occupancy_gap:.1f} p.p."
+        if bounds.may_fit:
+            height_delta = f"mínimo {bounds.height_usage:.1f}% · gap {height_gap:.1f} p.p."
+
+    # Resultados
+    st.subheader("📊 RESULTADOS")
     
-    # Arestas do trailer
-    edges = [
-        [0, 1], [1, 2], [2, 3], [3, 0],  # base
-        [4, 5], [5, 6], [6, 7], [7, 4],  # topo
-        [0, 4], [1, 5], [2, 6], [3, 7]   # verticais
-    ]
-    
-    for edge in edges:
-        points = [corners[edge[0]], corners[edge[1]]]
-        ax.plot3D(*zip(*points), color='red', linewidth=2, alpha=0.8)
-
-# =================== FUNÇÕES DE ANÁLISE ===================
-def analyze_packing_efficiency(placed: List[Box], trailer: Trailer):
-    """Analisa a eficiência do empacotamento"""
-    if not placed:
-        return {}
-    
-    # Estatísticas básicas
-    total_boxes = len(placed)
-    total_volume_used = sum(b.volume for b in placed)
-    trailer_volume = trailer.volume
-    efficiency = (total_volume_used / trailer_volume) * 100
+    # Métricas principais
+    cols = st.columns(5)
+    with cols[0]:
+        st.metric("📦 Caixas Empacotadas", len(placed))
+    with cols[1]:
+        st.metric("❌ Não Empacotadas", len(unplaced))
+    with cols[2]:
+        st.metric("📈 Taxa de Ocupação", f"{eficiencia:.1f}%", delta=occupancy_delta, delta_color="off",
+                  help="Limite: maior ocupação possível com estas caixas neste trailer")
+    with cols[3]:
+        st.metric("📏 Altura Utilizada", f"{analysis.get('height_usage', 0):.1f}%", delta=height_delta,
+                  delta_color="off", help="Mínimo: menor altura possível para todas as caixas que cabem")
+    with cols[4]:
+        st.metric("🎯 Volume Ocupado", f"{vol_usado:.2f} m³")
+
+    if opt_result is not None:
+        st.caption(f"🎯 {opt_result.passes} tentativas · ordenação '{opt_result.params['sort_key']}' · "
+                   f"orientação '{opt_result.params['prefer'] or 'padrão'}'"
+                   + (" · ótimo (alcançou os limites)" if opt_result.optimal else ""))
+        st.line_chart(pd.DataFrame(
+            [(t, vol / trailer.volume * 100) for t, vol in opt_result.history],
+            columns=["Tempo (s)", "Ocupação (%)"],
+        ).set_index("Tempo (s)"))
+
+    # Visualização 3D
+    st.subheader("🎯 VISUALIZAÇÃO 3D")
     
-    # Análise por altura
-    max_height = max(b.pos[2] + b.a for b in placed) if placed else 0
-    height_usage = (max_height / trailer.a) * 100
+    # Controles de visualização
+    col_vis1, col_vis2 = st.columns([3, 1])
     
-    # Análise de orientações usadas
-    orientations_used = {}
-    for box in placed:
-        if hasattr(box, 'used_orientation') and box.used_orientation:
-            ori = box.used_orientation
-            orientations_used[ori] = orientations_used.get(ori, 0) + 1
+    with col_vis2:
+        show_wireframe = st.checkbox("Mostrar estrutura", value=True)
+        alpha_val = st.slider("Transparência", 0.3, 1.0, 0.85)
+        view_preset = st.selectbox("Ângulo", list(VIEW_PRESETS))
     
-    return {
-        'total_boxes': total_boxes,
-        'volume_efficiency': efficiency,
-        'height_usage': height_usage,
-        'max_height_used': max_height,
-        'orientations_used': orientations_used
-    }
+    with col_vis1:
+        with result["diagnostics"].stage("render", replace=True):
+            fig = packing_figure(
+                placed, trailer, alpha=alpha_val, show_wireframe=show_wireframe, view=view_preset,
+                title=f"Empacotamento - {len(placed)} caixas - {eficiencia:.1f}% ocupação",
+            )
+        st.plotly_chart(fig, use_container_width=True)
+        st.download_button("💾 Baixar plano (.cubplan)", plan_bytes(placed, trailer),
+                           file_name="plano.cubplan", mime="application/octet-stream",
+                           help="Arquivo binário compacto com a posição de cada caixa; "
+                                "pode ser aberto de novo aqui sem recalcular")
+
+    # Análises complementares
+    if analysis.get('orientations_used'):
+        st.subheader("📐 ORIENTAÇÕES UTILIZADAS")
+        ori_df = pd.DataFrame([
+            {"Orientação (CxLxA)": k, "Quantidade": v} 
+            for k, v in analysis['orientations_used'].items()
+        ])
+        st.dataframe(ori_df, hide_index=True, use_container_width=True)
+
+    # Problemas encontrados
+    if unplaced or not missing.empty:
+        st.subheader("⚠️ ITENS NÃO PROCESSADOS")
+        
+        tab1, tab2 = st.tabs(["Não Empacotados", "Sem Medidas"])
+        
+        with tab1:
+            if unplaced:
+                unplaced_summary = pd.DataFrame(unplaced.summary()).sort_values(
+                    ['SKU', 'Dimensões Originais', 'Volume'])
+                st.dataframe(unplaced_summary, hide_index=True, use_container_width=True)
+                
+                st.error(f"❌ {len(unplaced)} caixas não couberam no trailer")
+            else:
+                st.success("✅ Todas as caixas foram empacotadas!")
+        
+        with tab2:
+            if not missing.empty:
+                st.dataframe(missing[['COD SKU']].drop_duplicates(), hide_index=True)
+            else:
+                st.success("✅ Todas as medidas foram encontradas!")
+
+    # Resumo final
+    if eficiencia > 80:
+        st.success(f"🎉 Excelente! Ocupação de {eficiencia:.1f}% com {len(placed)} caixas empacotadas")
+    elif eficiencia > 60:
+        st.warning(f"⚠️ Razoável. Ocupação de {eficiencia:.1f}% - considere ajustar rotações")
+    else:
+        st.error(f"❌ Baixa eficiência: {eficiencia:.1f}% - verifique dimensões e rotações")
+
+    if result["diagnostics"].enabled:
+        render_diagnostics(result["diagnostics"])
+
+def render_diagnostics(diag: Diagnostics):
+    """Painel recolhível com tempos por etapa e contadores do motor"""
+    with st.expander("🩺 DIAGNÓSTICO", expanded=False):
+        col_stages, col_counters = st.columns(2)
+        with col_stages:
+            st.markdown("**Tempo por etapa**")
+            st.dataframe(pd.DataFrame(
+                [{"Etapa": k, "Segundos": round(v, 4)} for k, v in diag.stages.items()]
+            ), hide_index=True, use_container_width=True)
+        with col_counters:
+            st.markdown("**Contadores do motor**")
+            st.dataframe(pd.DataFrame(
+                [{"Contador": k, "Valor": v} for k, v in diag.counters.items()]
+            ), hide_index=True, use_container_width=True)
+        st.download_button("💾 Baixar diagnóstico (JSON)", diag.to_json(),
+                           file_name="diagnostico.json", mime="application/json")
 
 # =================== INTERFACE STREAMLIT ===================
 def main():
@@ -320,14 +354,37 @@ def main():
             
             # Mostra volume do trailer
             st.info(f"Volume total: {trailer.volume:.2f} m³")
+            
+            fleet_mode = st.checkbox("🚚 Modo frota (dividir em vários veículos)", value=False)
+            if fleet_mode:
+                fleet_df = st.data_editor(
+                    pd.DataFrame([{"Comprimento": c, "Largura": l, "Altura": a, "Quantidade": 2}]),
+                    num_rows="dynamic", hide_index=True, use_container_width=True,
+                )
+
+            sweep_mode = st.checkbox("🔀 Comparar cenários (veículos × rotações)", value=False,
+                                     disabled=fleet_mode,
+                                     help="Empacota a mesma carga em cada perfil e combinação de rotações, "
+                                          "em paralelo, e ordena os resultados") and not fleet_mode
+            if sweep_mode:
+                profiles_df = st.data_editor(
+                    pd.DataFrame([{"Nome": "Atual", "Comprimento": c, "Largura": l, "Altura": a}]),
+                    num_rows="dynamic", hide_index=True, use_container_width=True,
+                )
         
         with col2:
             st.subheader("📋 Arquivos")
             col_car, col_med = st.columns(2)
             with col_car:
-                car_file = st.file_uploader("Planilha de Carregamento", type="xlsx")
+                car_file = st.file_uploader("Planilha de Carregamento", type=["xlsx", "csv"])
             with col_med:
-                med_file = st.file_uploader("Planilha de Medidas", type="xlsx")
+                med_file = st.file_uploader("Planilha de Medidas", type=["xlsx", "csv"])
+            stream_mode = st.checkbox("📥 Leitura em fluxo (planilhas muito grandes)", value=False,
+                                      help="Lê o carregamento em lotes, com memória limitada; CSV sempre usa este modo")
+            diag_mode = st.checkbox("🩺 Diagnóstico", value=False,
+                                    help="Mede o tempo de cada etapa e conta o trabalho do motor de empacotamento")
+            plan_file = st.file_uploader("Plano salvo (.cubplan)", type=["cubplan"],
+                                         help="Mostra um plano já calculado, sem empacotar de novo")
 
     # Configurações de Rotação
     with st.expander("🔄 OPÇÕES DE ROTAÇÃO", expanded=True):
@@ -361,151 +418,101 @@ def main():
             rotation_axes = ['XY']
             
         st.info(f"✅ Rotações ativas: {', '.join(rotation_axes)}")
+        if sweep_mode:
+            combo_labels = ["+".join(combo) for combo in rotation_combos()]
+            sweep_combos = st.multiselect("Rotações a comparar", combo_labels,
+                                          default=["+".join(rotation_axes)])
+        
+        engine_label = st.radio("Motor de empacotamento", list(PACKERS), horizontal=True,
+                                help="Camadas é o mais rápido; pontos extremos empilha em 3D sobre apoios "
+                                     "irregulares, aproveita o espaço acima das caixas baixas e nunca passa da altura")
+        block_mode = st.checkbox("🧱 Empacotar caixas idênticas em blocos", value=True,
+                                 disabled=PACKERS[engine_label] is not pack_grouped_corrected,
+                                 help="Coloca cada SKU em tijolos inteiros por camada em vez de caixa a caixa")
+        pattern_mode = st.checkbox("♻️ Reaproveitar padrões de camada", value=True,
+                                   disabled=PACKERS[engine_label] is not pack_grouped_corrected,
+                                   help="Guarda em disco as camadas já resolvidas e as reaplica quando as mesmas "
+                                        "caixas voltam no mesmo piso de trailer")
+        
+        col_opt1, col_opt2 = st.columns([1, 2])
+        with col_opt1:
+            opt_mode = st.checkbox("🎯 Otimizar com várias tentativas", value=False, disabled=sweep_mode or fleet_mode,
+                                   help="Repete o empacotamento variando ordens e orientações, em paralelo, e fica com o melhor "
+                                        "(não disponível no modo frota)") and not (sweep_mode or fleet_mode)
+        with col_opt2:
+            opt_budget = st.slider("Tempo de otimização (s)", 2, 120, 15, disabled=not opt_mode)
+
+    # Chave da simulação: arquivos + tudo que muda o empacotamento
+    options = {
+        "trailer": (trailer.c, trailer.l, trailer.a),
+        "rotation_axes": rotation_axes,
+        "block": block_mode,
+        "stream": stream_mode,
+        "opt": opt_budget if opt_mode else None,
+        "fleet": fleet_df.to_dict("records") if fleet_mode else None,
+        "sweep": (profiles_df.to_dict("records"), sweep_combos) if sweep_mode else None,
+        "diagnostics": diag_mode,
+        "engine": engine_label,
+        "patterns": pattern_mode,
+    }
+    run_key = simulation_key(car_file, med_file, options) if car_file and med_file else None
+    results: OrderedDict = st.session_state.setdefault("packing_results", OrderedDict())
+
+    jobs: dict = st.session_state.setdefault("packing_jobs", {})
+    queue = get_job_queue()
+
+    # Parâmetros mudaram: o trabalho anterior não seria mais mostrado, então é cancelado
+    for key in [k for k in jobs if k != run_key]:
+        queue.forget(jobs.pop(key))
 
-    # Botão principal
+    # Botão principal: a simulação roda na fila de trabalhos, fora desta sessão
     if st.button("🚀 EXECUTAR SIMULAÇÃO", type="primary", use_container_width=True):
         if not (car_file and med_file):
             st.error("⚠️ Selecione ambos os arquivos!")
             return
 
-        try:
-            with st.spinner("🔄 Processando empacotamento..."):
-                # Carrega dados
-                merged, missing = load_files(car_file, med_file)
-                st.success(f"✅ Dados carregados: {len(merged)} itens válidos")
-                
-                # Cria grupos com rotação
-                sku_groups = expand_grouped_with_rotation(merged, rotation_axes)
-                total_boxes = sum(len(group) for group in sku_groups)
-                st.info(f"📦 Total de caixas a serem empacotadas: {total_boxes}")
-                
-                # Executa empacotamento
-                placed, unplaced = pack_grouped_corrected(trailer, sku_groups)
-                
-                # Calcula estatísticas
-                vol_total = trailer.volume
-                vol_usado = sum(b.volume for b in placed)
-                eficiencia = (vol_usado / vol_total) * 100 if vol_total > 0 else 0
-                
-                # Análise detalhada
-                analysis = analyze_packing_efficiency(placed, trailer)
+        if sweep_mode and not sweep_combos:
+            st.error("⚠️ Escolha ao menos uma combinação de rotações!")
+            return
 
-            # Resultados
-            st.subheader("📊 RESULTADOS")
-            
-            # Métricas principais
-            cols = st.columns(5)
-            with cols[0]:
-                st.metric("📦 Caixas Empacotadas", len(placed))
-            with cols[1]:
-                st.metric("❌ Não Empacotadas", len(unplaced))
-            with cols[2]:
-                st.metric("📈 Taxa de Ocupação", f"{eficiencia:.1f}%")
-            with cols[3]:
-                st.metric("📏 Altura Utilizada", f"{analysis.get('height_usage', 0):.1f}%")
-            with cols[4]:
-                st.metric("🎯 Volume Ocupado", f"{vol_usado:.2f} m³")
-
-            # Visualização 3D
-            st.subheader("🎯 VISUALIZAÇÃO 3D")
-            
-            # Controles de visualização
-            col_vis1, col_vis2 = st.columns([3, 1])
-            
-            with col_vis2:
-                show_wireframe = st.checkbox("Mostrar estrutura", value=True)
-                alpha_val = st.slider("Transparência", 0.3, 1.0, 0.85)
-                view_preset = st.selectbox("Ângulo", ["Isométrico", "Frontal", "Lateral", "Superior"])
-            
-            with col_vis1:
-                # Configura o plot
-                fig = plt.figure(figsize=(14, 10))
-                ax = fig.add_subplot(111, projection='3d')
-                
-                ax.set_xlim(0, trailer.c)
-                ax.set_ylim(0, trailer.l) 
-                ax.set_zlim(0, trailer.a)
-                ax.set_xlabel("Comprimento (m)")
-                ax.set_ylabel("Largura (m)")
-                ax.set_zlabel("Altura (m)")
-                
-                # Ângulos de visualização
-                view_angles = {
-                    "Isométrico": (25, -60),
-                    "Frontal": (0, 0),
-                    "Lateral": (0, 90),
-                    "Superior": (90, 0)
-                }
-                elev, azim = view_angles[view_preset]
-                ax.view_init(elev=elev, azim=azim)
-                
-                # Wireframe do trailer
-                if show_wireframe:
-                    add_trailer_wireframe(ax, trailer)
-                
-                # Desenha as caixas
-                if placed:
-                    skus_unicos = list(set([b.id.split('-')[0] for b in placed]))
-                    cores = cm.get_cmap('tab20', len(skus_unicos))(range(len(skus_unicos)))
-                    
-                    for box in placed:
-                        sku_id = box.id.split('-')[0]
-                        cor = cores[skus_unicos.index(sku_id)]
-                        add_box(ax, *box.pos, box.c, box.l, box.a, cor, alpha_val)
-                
-                ax.set_title(f"Empacotamento - {len(placed)} caixas - {eficiencia:.1f}% ocupação", 
-                           fontsize=14)
-                
-                st.pyplot(fig)
-
-            # Análises complementares
-            if analysis['orientations_used']:
-                st.subheader("📐 ORIENTAÇÕES UTILIZADAS")
-                ori_df = pd.DataFrame([
-                    {"Orientação (CxLxA)": k, "Quantidade": v} 
-                    for k, v in analysis['orientations_used'].items()
-                ])
-                st.dataframe(ori_df, hide_index=True, use_container_width=True)
-
-            # Problemas encontrados
-            if unplaced or not missing.empty:
-                st.subheader("⚠️ ITENS NÃO PROCESSADOS")
-                
-                tab1, tab2 = st.tabs(["Não Empacotados", "Sem Medidas"])
-                
-                with tab1:
-                    if unplaced:
-                        unplaced_df = pd.DataFrame([
-                            {
-                                "SKU": b.id.split('-')[0],
-                                "Dimensões Originais": f"{b.original_c:.2f}x{b.original_l:.2f}x{b.original_a:.2f}",
-                                "Volume": f"{b.volume:.3f} m³"
-                            } for b in unplaced
-                        ])
-                        unplaced_summary = unplaced_df.groupby(['SKU', 'Dimensões Originais', 'Volume']).size().reset_index(name='Quantidade')
-                        st.dataframe(unplaced_summary, hide_index=True, use_container_width=True)
-                        
-                        st.error(f"❌ {len(unplaced)} caixas não couberam no trailer")
-                    else:
-                        st.success("✅ Todas as caixas foram empacotadas!")
-                
-                with tab2:
-                    if not missing.empty:
-                        st.dataframe(missing[['COD SKU']].drop_duplicates(), hide_index=True)
-                    else:
-                        st.success("✅ Todas as medidas foram encontradas!")
-
-            # Resumo final
-            if eficiencia > 80:
-                st.success(f"🎉 Excelente! Ocupação de {eficiencia:.1f}% com {len(placed)} caixas empacotadas")
-            elif eficiencia > 60:
-                st.warning(f"⚠️ Razoável. Ocupação de {eficiencia:.1f}% - considere ajustar rotações")
-            else:
-                st.error(f"❌ Baixa eficiência: {eficiencia:.1f}% - verifique dimensões e rotações")
+        if run_key not in jobs and sweep_mode:
+            results.pop(run_key, None)
+            jobs[run_key] = queue.submit(
+                run_sweep, _uploaded(car_file), _uploaded(med_file), scenarios_from(profiles_df, sweep_combos),
+                block=block_mode, stream=stream_mode,
+                diagnostics=Diagnostics() if diag_mode else NULL_DIAGNOSTICS, packer=PACKERS[engine_label],
+                pooled=True,
+            )
+        elif run_key not in jobs:
+            results.pop(run_key, None)
+            jobs[run_key] = queue.submit(
+                run_simulation, _uploaded(car_file), _uploaded(med_file), trailer, rotation_axes,
+                block=block_mode, stream=stream_mode, opt_budget=opt_budget if opt_mode else None,
+                fleet_trailers=fleet_trailers_from(fleet_df) if fleet_mode else None,
+                diagnostics=Diagnostics() if diag_mode else NULL_DIAGNOSTICS, packer=PACKERS[engine_label],
+                patterns=PatternCache() if pattern_mode and PACKERS[engine_label] is pack_grouped_corrected else None,
+                pooled=True,
+            )
+
+    if run_key in jobs:
+        job_monitor(queue, run_key)
 
+    # Controles de visualização só redesenham o último resultado destes parâmetros
+    if run_key in results:
+        results.move_to_end(run_key)
+        try:
+            if "sweep" in results[run_key]:
+                render_sweep(results[run_key])
+            else:
+                render_results(results[run_key])
         except Exception as e:
             st.error(f"❌ ERRO: {str(e)}")
             st.exception(e)
+    elif plan_file is not None:
+        try:
+            render_results(plan_result(plan_file))
+        except ValueError as e:
+            st.error(f"❌ ERRO: {str(e)}")
 
 if __name__ == "__main__":
     main()